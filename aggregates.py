@@ -0,0 +1,64 @@
+import hashlib
+
+import numpy as np
+
+from storage import read_arrays, write_arrays
+
+# Startup snapshot of a standings table: everything a Snapshot derives from it, as
+# plain numpy arrays that load without pandas:
+#   teams           sorted team names
+#   team_offsets    (T + 1): team t's rows are rows[team_offsets[t]:team_offsets[t + 1]]
+#   columns         standings column names, in table order
+#   column_<name>   every column but Team, rows sorted by team (in table order within a team)
+#   weeks           game weeks, sorted
+#   mean_<name>, std_<name>   league average and standard deviation per week of every
+#                   numeric column, aligned with weeks
+#   standings_hash  digest of the standings file the arrays were built from
+def build_aggregates(standings_df):
+    import pandas as pd
+    teams = np.array(sorted(str(team) for team in standings_df['Team'].unique()), dtype=str)
+    codes = pd.Categorical(standings_df['Team'].astype(str), categories=teams).codes
+    order = np.argsort(codes, kind='stable')
+    arrays = {
+        'teams': teams,
+        'team_offsets': np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(teams)))]).astype(np.int32),
+        'columns': np.array(standings_df.columns, dtype=str),
+    }
+    for column in standings_df.columns:
+        if column != 'Team':
+            arrays[f'column_{column}'] = standings_df[column].to_numpy()[order]
+
+    by_week = standings_df.groupby('Game_Week')
+    arrays['weeks'] = by_week.size().index.to_numpy()
+    for column in standings_df.columns:
+        if column not in ('Team', 'Game_Week'):
+            arrays[f'mean_{column}'] = by_week[column].mean().to_numpy(np.float64)
+            arrays[f'std_{column}'] = by_week[column].std().to_numpy(np.float64)
+    return arrays
+
+# Content digest of a file: unlike its mtime, it survives copies and checkouts of the store
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def write_aggregates(arrays, path, standings_path):
+    return write_arrays(dict(arrays, standings_hash=np.array(file_hash(standings_path))), path)
+
+# The startup snapshot at `path` if it was built from the current standings file, else None
+def load_aggregates(path, standings_path):
+    arrays = read_arrays(path)
+    if str(arrays.pop('standings_hash')) != file_hash(standings_path):
+        return None
+    return arrays
+
+# Per-team standings frames (the Snapshot team index), each a slice of the sorted rows
+def team_frames(arrays):
+    import pandas as pd
+    offsets = arrays['team_offsets']
+    frames = {}
+    for i, team in enumerate(arrays['teams']):
+        start, end = offsets[i], offsets[i + 1]
+        frames[str(team)] = pd.DataFrame({
+            column: np.full(end - start, str(team), dtype=object) if column == 'Team' else arrays[f'column_{column}'][start:end]
+            for column in arrays['columns']})
+    return frames
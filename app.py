@@ -1,34 +1,39 @@
 import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output
-import pandas as pd
-import plotly.graph_objects as go
+from dash import ctx, dcc, html, no_update
+from dash.exceptions import PreventUpdate
+from dash.dependencies import ClientsideFunction, Input, Output, State
+from flask import request as flask_request
 import dash_bootstrap_components as dbc
-from dash_bootstrap_templates import load_figure_template
-import numpy as np
+# Imported here because it registers Dash components, which may not happen inside a
+# callback; its figure template is loaded by figures.py when the first figure is built
+import dash_bootstrap_templates  # noqa: F401
 import os
 
-# Load the standings data
-standings_df = pd.read_csv('data/standings_per_week.csv')
+from compression import enable_compression
+from crests import crest_asset, load_manifest
+from data_provider import PartitionProviders
+from instrumentation import instrument
+from live import LiveTables
+from storage import list_partitions
 
-# Calculate averages and standard deviations per game week
-average_points = standings_df.groupby('Game_Week')['Points'].mean()
-std_dev_points = standings_df.groupby('Game_Week')['Points'].std()
-average_goals_for = standings_df.groupby('Game_Week')['Goals_For'].mean()
-std_dev_goals_for = standings_df.groupby('Game_Week')['Goals_For'].std()
-average_goals_against = standings_df.groupby('Game_Week')['Goals_Against'].mean()
-std_dev_goals_against = standings_df.groupby('Game_Week')['Goals_Against'].std()
+# Rendering mode: 'server' builds the team view in a Python callback, 'client' ships the
+# whole season to the browser once and draws every team switch in assets/clientside.js
+RENDER_MODE = os.environ.get('RENDER_MODE', 'server')
 
-# Standard deviation of goal difference (average is always zero)
-std_dev_goal_diff = standings_df.groupby('Game_Week')['Goal_Diff'].std()
+# Competition shown when the dashboard opens
+DEFAULT_COMPETITION = os.environ.get('DEFAULT_COMPETITION', 'PL')
 
-# Define color scheme
-team_color = 'navy' # Main team color
-average_color = 'crimson' # Average line color 
-std_dev_color = 'rgba(192, 192, 192, 0.3)'  # Standard deviation fill color (gray with transparency)
+# Show each team's crest in the team dropdown, drawn from one sprite sheet (CREST_SPRITES=1)
+CREST_SPRITES = os.environ.get('CREST_SPRITES', '0') == '1'
 
-# Load a Bootstrap template
-load_figure_template('simplex')
+# Form window lengths offered in the head-to-head view
+FORM_LENGTHS = [3, 5, 10]
+
+# Provisional live table during matchdays (LIVE_UPDATES=1), published by live.py and
+# checked by every open page each LIVE_REFRESH_MS milliseconds. In client rendering
+# mode the live table is shown, but the charts are not redrawn with it.
+LIVE_UPDATES = os.environ.get('LIVE_UPDATES', '0') == '1'
+LIVE_REFRESH_MS = int(os.environ.get('LIVE_REFRESH_MS', 5000))
 
 # Initialize the Dash app with a Bootstrap theme
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUX])
@@ -36,231 +41,270 @@ app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUX])
 # Make server available for gunicorn
 server = app.server
 
-# Get the list of unique teams for the dropdown, sorted alphabetically
-teams = sorted(standings_df['Team'].unique())
+# Brotli/gzip for the page, the Dash bundles and callback responses (COMPRESS_RESPONSES=0 turns it off).
+# Flask runs after_request hooks last-registered first, so registering it before the
+# instrumentation keeps compression out of the timed serialization and payload sizes.
+enable_compression(server)
+
+# Per-callback timing and /metrics when DASH_INSTRUMENTATION=1; must run before the callbacks are registered
+instrument(app)
+
+# Built crests have content-hashed names, so browsers may cache them for good
+@server.after_request
+def cache_crests(response):
+    if response.status_code == 200 and flask_request.path.startswith(app.get_asset_url('crests/')) \
+            and not flask_request.path.endswith('.json'):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+# Standings per (competition, season) partition of the columnar store, each loaded
+# on first use and reloaded in the background when its file changes
+data_providers = PartitionProviders()
+
+# Live tables written by live.py, re-read by this process when they change
+live_tables = LiveTables()
+
+# Load every partition, with its figures, before gunicorn forks the workers
+# (GUNICORN_PRELOAD=1, see gunicorn.conf.py), so they share it rather than each
+# loading its own. Returns the partitions loaded.
+def warm_start():
+    return data_providers.preload()
+
+# Season labels, e.g. 2023 -> "2023/24" for the dropdown and "23/24 Season - ..." for the title
+def season_options(seasons):
+    return [{'label': f"{season}/{(season + 1) % 100:02d}", 'value': season} for season in seasons]
+
+def dashboard_title(season):
+    return f"{season % 100:02d}/{(season + 1) % 100:02d} Season - Club Performance Dashboard"
+
+# Title of a partition's dashboard; a season before its first result has no teams to show yet
+def partition_title(season, teams):
+    return dashboard_title(season) if teams else f"{dashboard_title(season)} (no results yet)"
+
+# Club crest image URL for a team: the built, content-hashed crest from the
+# manifest (python crests.py), or the downloaded original if it has not been built
+def club_crest_url(selected_team):
+    asset = crest_asset(selected_team)
+    if asset is None:
+        asset = selected_team.replace(' ', '_') + '_crest.png'
+    return app.get_asset_url(asset)
+
+# Team dropdown options; with CREST_SPRITES each label starts with the team's icon,
+# cut from the sprite sheet so the whole list costs a single image request
+def team_options(teams):
+    sprite = load_manifest().get('sprite')
+    if not CREST_SPRITES or sprite is None:
+        return [{'label': team, 'value': team} for team in teams]
+
+    manifest_teams = load_manifest()['teams']
+    size = sprite['icon_size']
+    options = []
+    for team in teams:
+        style = {'display': 'inline-block', 'width': f'{size}px', 'height': f'{size}px',
+                 'marginRight': '8px', 'verticalAlign': 'middle'}
+        if team in manifest_teams:
+            style.update(backgroundImage=f"url({app.get_asset_url('crests/' + sprite['src'])})",
+                         backgroundSize=f"{sprite['count'] * size}px {size}px",
+                         backgroundPosition=f"{-manifest_teams[team]['sprite_index'] * size}px 0")
+        options.append({'label': html.Span([html.Span(style=style), team]), 'value': team, 'search': team})
+    return options
+
+# Layout of the app using Bootstrap components, built per page load so the
+# competition, season and team lists (and in client mode the season payload)
+# follow the latest data. Opens on the latest season of DEFAULT_COMPETITION.
+def serve_layout():
+    partitions = list_partitions()
+    if not partitions:
+        return dbc.Container([
+            html.H3("No data yet"),
+            html.P("Run fetch_data.py and process_data.py to build the store, then reload this page."),
+        ], fluid=True)
+    competitions = sorted({competition for competition, _ in partitions})
+    competition = DEFAULT_COMPETITION if DEFAULT_COMPETITION in competitions else competitions[0]
+    seasons = [season for partition_competition, season in partitions if partition_competition == competition]
+    season = seasons[0]
+    snapshot = data_providers.get(competition, season)
+
+    # Teams for the dropdown, sorted alphabetically
+    teams = snapshot.teams
+
+    layout = dbc.Container([
+        # Header section with Premier League logo
+        dbc.Card(
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col(
+                        html.Img(
+                            src='https://upload.wikimedia.org/wikipedia/en/f/f2/Premier_League_Logo.svg', 
+                            height='100px'
+                        ), 
+                        width=3
+                    ),
+                    dbc.Col(
+                        html.H1(partition_title(season, teams), id='dashboard-title'), 
+                        width=9,
+                        style={'alignSelf': 'center'}  # Vertically centers the text column relative to the logo
+                    ),
+                ], 
+                align='center'  # Aligns the items in the row along the cross-axis (vertically)
+                )
+            ]),
+            className="mb-4",
+            style={"backgroundColor": "white", "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.1)"}
+        ),
+
+        # Club crest, team dropdown and competition/season selectors
+        dbc.Row([
+            dbc.Col(
+                html.Img(id='club-crest', height='100px'),  # Placeholder for club crest
+                width=2
+            ),
+            dbc.Col(
+                dcc.Dropdown(
+                    id='team-dropdown',
+                    options=team_options(teams),
+                    value=teams[0] if teams else None,  # Default value
+                    clearable=False
+                ), width=3
+            ),
+            dbc.Col(
+                dcc.Dropdown(
+                    id='competition-dropdown',
+                    options=[{'label': code, 'value': code} for code in competitions],
+                    value=competition,
+                    clearable=False
+                ), width=2
+            ),
+            dbc.Col(
+                dcc.Dropdown(
+                    id='season-dropdown',
+                    options=season_options(seasons),
+                    value=season,
+                    clearable=False
+                ), width=2
+            )
+        ], align='center'),
+
+        # Row for charts with added vertical space
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='cumulative-points-chart'), width=6),
+            dbc.Col(dcc.Graph(id='cumulative-goals-scored-chart'), width=6)
+        ], style={'marginTop': '20px'}),  # Adds vertical space above the charts
 
-# Layout of the app using Bootstrap components
-app.layout = dbc.Container([
-    # Header section with Premier League logo
-    dbc.Card(
-        dbc.CardBody([
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='cumulative-goals-conceded-chart'), width=6),
+            dbc.Col(dcc.Graph(id='cumulative-goal-diff-chart'), width=6)
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='standings-line-chart'), width=12)  # League position chart moved to bottom
+        ]),
+        dbc.Row([
+            dbc.Col(html.Div(id='probability-chart-container'), width=12)  # Monte Carlo outcome probabilities
+        ]),
+        dbc.Row([
+            dbc.Col(html.Div(id='final-summary-table'), width=12)
+        ]),
+
+        # Provisional live table, and the timer that checks for a new version of it
+        *([
             dbc.Row([
-                dbc.Col(
-                    html.Img(
-                        src='https://upload.wikimedia.org/wikipedia/en/f/f2/Premier_League_Logo.svg', 
-                        height='100px'
-                    ), 
-                    width=3
-                ),
-                dbc.Col(
-                    html.H1("23/24 Season - Club Performance Dashboard"), 
-                    width=9,
-                    style={'alignSelf': 'center'}  # Vertically centers the text column relative to the logo
-                ),
-            ], 
-            align='center'  # Aligns the items in the row along the cross-axis (vertically)
+                dbc.Col(html.Div(id='live-standings'), width=12)
+            ]),
+            dcc.Interval(id='live-interval', interval=LIVE_REFRESH_MS),
+            dcc.Store(id='live-version')
+        ] if LIVE_UPDATES else []),
+
+        # Head-to-head comparison against a chosen opponent
+        dbc.Row([
+            dbc.Col(html.H3("Head-to-Head"), width=3),
+            dbc.Col(
+                dcc.Dropdown(
+                    id='opponent-dropdown',
+                    options=team_options(teams),
+                    value=teams[1] if len(teams) > 1 else teams[0] if teams else None,
+                    clearable=False
+                ), width=3
+            ),
+            dbc.Col(
+                dcc.Dropdown(
+                    id='form-length-dropdown',
+                    options=[{'label': f"Last {n} matches", 'value': n} for n in FORM_LENGTHS],
+                    value=FORM_LENGTHS[1],
+                    clearable=False
+                ), width=2
             )
+        ], align='center', style={'marginTop': '20px'}),
+        dbc.Row([
+            dbc.Col(html.Div(id='head-to-head'), width=12)
+        ])
+    ], fluid=True)
+
+    if RENDER_MODE == 'client':
+        layout.children.append(dcc.Store(id='season-data', data=season_payload(snapshot)))
+    return layout
+
+# Season payload for clientside rendering, with each team's crest URL
+def season_payload(snapshot):
+    payload = dict(snapshot.client_payload())
+    payload['crests'] = [club_crest_url(team) for team in payload['teams']]
+    return payload
+
+app.layout = serve_layout
+
+RECORD_COLUMNS = [('Played', 'P'), ('Wins', 'W'), ('Draws', 'D'), ('Losses', 'L'),
+                  ('Goals_For', 'GF'), ('Goals_Against', 'GA'), ('Points', 'Pts')]
+
+# Table of result totals, one row per (label, record) pair
+def record_table(rows):
+    return dbc.Table([
+        html.Thead(html.Tr([html.Th('')] + [html.Th(short) for _, short in RECORD_COLUMNS])),
+        html.Tbody([html.Tr([html.Td(label)] + [html.Td(record[column]) for column, _ in RECORD_COLUMNS])
+                    for label, record in rows])
+    ], size='sm', striped=True)
+
+# Table of matches, most recent first
+def matches_table(matches):
+    if not matches:
+        return html.P("No matches played.")
+    return dbc.Table([
+        html.Thead(html.Tr([html.Th(heading) for heading in ('Date', 'Week', 'Opponent', 'H/A', 'Score', '')])),
+        html.Tbody([html.Tr([html.Td(match['Date']), html.Td(match['Game_Week']), html.Td(match['Opponent']),
+                             html.Td(match['Venue']), html.Td(f"{match['Goals_For']}-{match['Goals_Against']}"),
+                             html.Td(match['Result'])])
+                    for match in reversed(matches)])
+    ], size='sm', striped=True)
+
+# Head-to-head record, recent meetings, each team's form and home/away splits,
+# all read from the partition's team-pair index
+def head_to_head(pair_index, team, opponent, n):
+    team_splits, opponent_splits = pair_index.splits(team), pair_index.splits(opponent)
+    return html.Div([
+        html.H4(f"{team} vs {opponent}"),
+        record_table([('All', pair_index.record(team, opponent)),
+                      (f"At {team}", pair_index.record(team, opponent, 'home')),
+                      (f"At {opponent}", pair_index.record(team, opponent, 'away'))]),
+        html.H5(f"Last {n} meetings"),
+        matches_table(pair_index.form(team, n, opponent)),
+        dbc.Row([
+            dbc.Col([html.H5(f"{team} - last {n} matches"), matches_table(pair_index.form(team, n))], width=6),
+            dbc.Col([html.H5(f"{opponent} - last {n} matches"), matches_table(pair_index.form(opponent, n))], width=6)
         ]),
-        className="mb-4",
-        style={"backgroundColor": "white", "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.1)"}
-    ),
-
-    # Club crest and team dropdown
-    dbc.Row([
-        dbc.Col(
-            html.Img(id='club-crest', height='100px'),  # Placeholder for club crest
-            width=2
-        ),
-        dbc.Col(
-            dcc.Dropdown(
-                id='team-dropdown',
-                options=[{'label': team, 'value': team} for team in teams],
-                value=teams[0],  # Default value
-                clearable=False
-            ), width=3
-        )
-    ], align='center'),
-
-    # Row for charts with added vertical space
-    dbc.Row([
-        dbc.Col(dcc.Graph(id='cumulative-points-chart'), width=6),
-        dbc.Col(dcc.Graph(id='cumulative-goals-scored-chart'), width=6)
-    ], style={'marginTop': '20px'}),  # Adds vertical space above the charts
-
-    dbc.Row([
-        dbc.Col(dcc.Graph(id='cumulative-goals-conceded-chart'), width=6),
-        dbc.Col(dcc.Graph(id='cumulative-goal-diff-chart'), width=6)
-    ]),
-    dbc.Row([
-        dbc.Col(dcc.Graph(id='standings-line-chart'), width=12)  # League position chart moved to bottom
-    ]),
-    dbc.Row([
-        dbc.Col(html.Div(id='final-summary-table'), width=12)
+        html.H5("Home/Away Splits"),
+        record_table([(f"{team} home", team_splits['home']), (f"{team} away", team_splits['away']),
+                      (f"{opponent} home", opponent_splits['home']), (f"{opponent} away", opponent_splits['away'])])
     ])
-], fluid=True)
 
-# Callback for club crest image
-@app.callback(
-    Output('club-crest', 'src'),
-    [Input('team-dropdown', 'value')]
-)
-def update_club_crest(selected_team):
-    formatted_team_name = selected_team.replace(' ', '_') + '_crest.png'
-    return app.get_asset_url(formatted_team_name)
+# Final summary table from the team's last game week
+def final_summary_table(team_data):
+    return summary_table(team_data.iloc[-1], "End of Season Summary")
 
-# Callback for cumulative points chart with average and shaded std deviation
-@app.callback(
-    Output('cumulative-points-chart', 'figure'),
-    [Input('team-dropdown', 'value')]
-)
-def update_cumulative_points_chart(selected_team):
-    team_data = standings_df[standings_df['Team'] == selected_team]
-    fig = go.Figure()
-
-    # Average points line
-    fig.add_trace(go.Scatter(x=average_points.index, y=average_points, mode='lines', name='Average', line=dict(color=average_color)))
-
-    # Shaded standard deviation region
-    fig.add_trace(go.Scatter(
-        x=average_points.index.tolist() + average_points.index.tolist()[::-1],
-        y=(average_points + std_dev_points).tolist() + (average_points - std_dev_points).tolist()[::-1],
-        fill='toself',
-        fillcolor=std_dev_color,
-        line=dict(color='rgba(255,255,255,0)'),
-        name="± 1 S.D.",
-        showlegend=True
-    ))
-
-    # Team's points
-    fig.add_trace(go.Scatter(x=team_data['Game_Week'], y=team_data['Points'], mode='lines+markers', name='Points', line=dict(color=team_color)))
-
-    fig.update_layout(title=f"{selected_team} - Cumulative Points", xaxis_title='Game Week', yaxis_title='Points')
-    return fig
-
-# Callback for cumulative goals scored chart with average and shaded std deviation
-@app.callback(
-    Output('cumulative-goals-scored-chart', 'figure'),
-    [Input('team-dropdown', 'value')]
-)
-def update_cumulative_goals_scored_chart(selected_team):
-    team_data = standings_df[standings_df['Team'] == selected_team]
-    fig = go.Figure()
-
-    # Average goals for line
-    fig.add_trace(go.Scatter(x=average_goals_for.index, y=average_goals_for, mode='lines', name='Average', line=dict(color=average_color)))
-
-    # Shaded standard deviation region
-    fig.add_trace(go.Scatter(
-        x=average_goals_for.index.tolist() + average_goals_for.index.tolist()[::-1],
-        y=(average_goals_for + std_dev_goals_for).tolist() + (average_goals_for - std_dev_goals_for).tolist()[::-1],
-        fill='toself',
-        fillcolor=std_dev_color,
-        line=dict(color='rgba(255,255,255,0)'),
-        name="± 1 S.D.",
-        showlegend=True
-    ))
-
-    # Team's goals for
-    fig.add_trace(go.Scatter(x=team_data['Game_Week'], y=team_data['Goals_For'], mode='lines+markers', name='Goals For', line=dict(color=team_color)))
-
-    fig.update_layout(title=f"{selected_team} - Cumulative Goals Scored", xaxis_title='Game Week', yaxis_title='Goals Scored')
-    return fig
-
-# Callback for cumulative goals conceded chart with average and shaded std deviation
-@app.callback(
-    Output('cumulative-goals-conceded-chart', 'figure'),
-    [Input('team-dropdown', 'value')]
-)
-def update_cumulative_goals_conceded_chart(selected_team):
-    team_data = standings_df[standings_df['Team'] == selected_team]
-    fig = go.Figure()
-
-    # Average goals against line
-    fig.add_trace(go.Scatter(x=average_goals_against.index, y=average_goals_against, mode='lines', name='Average', line=dict(color=average_color)))
-
-    # Shaded standard deviation region
-    fig.add_trace(go.Scatter(
-        x=average_goals_against.index.tolist() + average_goals_against.index.tolist()[::-1],
-        y=(average_goals_against + std_dev_goals_against).tolist() + (average_goals_against - std_dev_goals_against).tolist()[::-1],
-        fill='toself',
-        fillcolor=std_dev_color,
-        line=dict(color='rgba(255,255,255,0)'),
-        name="± 1 S.D.",
-        showlegend=True
-    ))
-
-    # Team's goals against
-    fig.add_trace(go.Scatter(x=team_data['Game_Week'], y=team_data['Goals_Against'], mode='lines+markers', name='Goals Against', line=dict(color=team_color)))
-
-    fig.update_layout(title=f"{selected_team} - Cumulative Goals Conceded", xaxis_title='Game Week', yaxis_title='Goals Conceded')
-    return fig
-
-# Callback for cumulative goal difference chart with shaded std deviation
-@app.callback(
-    Output('cumulative-goal-diff-chart', 'figure'),
-    [Input('team-dropdown', 'value')]
-)
-def update_cumulative_goal_diff_chart(selected_team):
-    team_data = standings_df[standings_df['Team'] == selected_team]
-    fig = go.Figure()
-
-    # Shaded standard deviation region (no average, mean is 0)
-    fig.add_trace(go.Scatter(
-        x=std_dev_goal_diff.index.tolist() + std_dev_goal_diff.index.tolist()[::-1],
-        y=(std_dev_goal_diff).tolist() + (-std_dev_goal_diff).tolist()[::-1],
-        fill='toself',
-        fillcolor=std_dev_color,
-        line=dict(color='rgba(255,255,255,0)'),
-        name="± 1 S.D.",
-        showlegend=True
-    ))
-
-     # Team's goal difference
-    fig.add_trace(go.Scatter(x=team_data['Game_Week'], y=team_data['Goal_Diff'], mode='lines+markers', name='Goal Difference', line=dict(color=team_color)))
-
-    # Add a horizontal line at zero
-    fig.add_hline(y=0, line_dash="dot")
-
-    fig.update_layout(
-        title=f"{selected_team} - Cumulative Goal Difference",
-        xaxis_title='Game Week',
-        yaxis_title='Goal Difference'
-    )
-    return fig
-
-# Callback for updating the league position chart
-@app.callback(
-    Output('standings-line-chart', 'figure'),
-    [Input('team-dropdown', 'value')]
-)
-def update_standings_chart(selected_team):
-    team_data = standings_df[standings_df['Team'] == selected_team]
-    fig = go.Figure(
-        go.Scatter(x=team_data['Game_Week'], y=team_data['Position'], mode='lines+markers', line=dict(color=team_color))
-    )
-    fig.update_layout(title=f"{selected_team} - League Position per Game Week",
-                      xaxis_title='Game Week',
-                      yaxis_title='League Position',
-                      yaxis=dict(range=[20.5, 0.5],  # Adjusted to give headroom above 1
-                                 autorange=False,
-                                 nticks=20,
-                                 tickmode='linear'))  # Fixed y-axis range from 1 to 20
-    return fig
-
-# Callback for final summary table
-@app.callback(
-    Output('final-summary-table', 'children'),
-    [Input('team-dropdown', 'value')]
-)
-def update_final_summary_table(selected_team):
-    # Filter the data for the final game week (38) for the selected team
-    final_week_data = standings_df[(standings_df['Team'] == selected_team) & (standings_df['Game_Week'] == 38)].iloc[0]
-    
-    # Add the final standing (position in game week 38)
+# Summary list of one standings row
+def summary_table(final_week_data, title):
+    # Add the final standing (position in the final game week)
     final_position = final_week_data['Position']
-    
+
     return html.Div([
-        html.H3("End of Season Summary"),  # Added header for the summary
+        html.H3(title),  # Added header for the summary
         html.Ul([
             html.Li(f"Team: {final_week_data['Team']}"),
             html.Li(f"Final League Position: {final_position}"),  # Display final standing
@@ -274,6 +318,205 @@ def update_final_summary_table(selected_team):
         ], style={'list-style-type': 'none', 'padding': '20px'})
     ])
 
+# Outputs of the team view, shared by the server and clientside callbacks
+TEAM_VIEW_OUTPUTS = [
+    Output('club-crest', 'src'),
+    Output('cumulative-points-chart', 'figure'),
+    Output('cumulative-goals-scored-chart', 'figure'),
+    Output('cumulative-goals-conceded-chart', 'figure'),
+    Output('cumulative-goal-diff-chart', 'figure'),
+    Output('standings-line-chart', 'figure'),
+    Output('final-summary-table', 'children'),
+]
+
+# Seasons stored for the selected competition, latest first; a competition with none
+# (a stale page, or a hand-made request) leaves the dropdown as it is
+@app.callback(
+    [Output('season-dropdown', 'options'),
+     Output('season-dropdown', 'value')],
+    [Input('competition-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def update_season_options(competition):
+    seasons = [season for partition_competition, season in list_partitions() if partition_competition == competition]
+    if not seasons:
+        raise PreventUpdate
+    return season_options(seasons), seasons[0]
+
+# Outputs refreshed when the competition or season changes
+PARTITION_OUTPUTS = [
+    Output('team-dropdown', 'options'),
+    Output('team-dropdown', 'value'),
+    Output('opponent-dropdown', 'options'),
+    Output('opponent-dropdown', 'value'),
+    Output('dashboard-title', 'children'),
+] + ([Output('season-data', 'data')] if RENDER_MODE == 'client' else [])
+
+# Snapshot of the partition a callback was asked for; a competition or season that is
+# not in the store (a stale page, or a hand-made request) leaves the outputs as they are
+def partition_snapshot(competition, season):
+    snapshot = data_providers.get(competition, season)
+    if snapshot is None:
+        raise PreventUpdate
+    return snapshot
+
+# Teams of the selected partition; the current team and opponent stay selected when they are still in the league
+@app.callback(
+    PARTITION_OUTPUTS,
+    [Input('competition-dropdown', 'value'),
+     Input('season-dropdown', 'value')],
+    [State('team-dropdown', 'value'),
+     State('opponent-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def update_partition(competition, season, selected_team, selected_opponent):
+    snapshot = partition_snapshot(competition, season)
+    team = selected_team if selected_team in snapshot.teams else next(iter(snapshot.teams), None)
+    opponent = selected_opponent if selected_opponent in snapshot.teams \
+        else next((name for name in snapshot.teams if name != team), team)
+    options = team_options(snapshot.teams)
+    outputs = [options, team, options, opponent, partition_title(season, snapshot.teams)]
+    if RENDER_MODE == 'client':
+        outputs.append(season_payload(snapshot))
+    return outputs
+
+# Whole team view in one response: crest, the five charts and the summary table.
+# Everything comes from one data snapshot: charts are its cached figures, and the
+# summary reads its team index instead of filtering the table. With a live table,
+# the position chart and summary show the team's provisional standing, and a new
+# live version only resends those two.
+def update_team_view(selected_team, competition, season, live_version=None):
+    snapshot = partition_snapshot(competition, season)
+    if selected_team not in snapshot.team_index:
+        raise PreventUpdate
+    position_chart, summary = live_team_view(snapshot, selected_team, competition, season)
+    if ctx.triggered_id == 'live-version':
+        return (no_update,) * 5 + (position_chart, summary)
+    return (
+        club_crest_url(selected_team),
+        snapshot.figure(selected_team, 'points'),
+        snapshot.figure(selected_team, 'goals_scored'),
+        snapshot.figure(selected_team, 'goals_conceded'),
+        snapshot.figure(selected_team, 'goal_diff'),
+        position_chart,
+        summary,
+    )
+
+# Position chart and summary of a team, from the live table when there is one.
+# Built once per live version, snapshot and team, and shared by every client.
+def live_team_view(snapshot, team, competition, season):
+    live_table = live_tables.get(competition, season) if LIVE_UPDATES else None
+    if live_table is None or team not in live_table.team_rows:
+        return snapshot.figure(team, 'position'), final_summary_table(snapshot.team_index[team])
+
+    def build():
+        from figures import with_live_position
+        row = live_table.team_rows[team]
+        return (with_live_position(snapshot.figure(team, 'position'), row['Game_Week'], row['Position']),
+                summary_table(row, f"Live Standing after Week {row['Game_Week']} (provisional)"))
+    return live_table.view((snapshot.version, team), build)
+
+LIVE_COLUMNS = [('Position', '#'), ('Team', 'Team'), ('Wins', 'W'), ('Draws', 'D'), ('Losses', 'L'),
+                ('Goals_For', 'GF'), ('Goals_Against', 'GA'), ('Goal_Diff', 'GD'), ('Points', 'Pts')]
+
+# Provisional table with the live scores, the selected team's row highlighted
+def live_standings_table(live_table, selected_team):
+    def change(row):
+        return f"▲{row['Change']}" if row['Change'] > 0 else f"▼{-row['Change']}" if row['Change'] < 0 else ''
+
+    return html.Div([
+        html.H3("Live Table (provisional)"),
+        html.P(', '.join(f"{match['Home_Team']} {match['Home_Score']}-{match['Away_Score']} {match['Away_Team']}"
+                         + ('' if match['Status'] == 'FINISHED' else ' (live)') for match in live_table.matches)),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th(short) for _, short in LIVE_COLUMNS] + [html.Th('')])),
+            html.Tbody([html.Tr([html.Td(row[column]) for column, _ in LIVE_COLUMNS] + [html.Td(change(row))],
+                                className='table-primary' if row['Team'] == selected_team else None)
+                        for row in live_table.rows])
+        ], size='sm', striped=True)
+    ])
+
+# Title, top-four and relegation probabilities per game week, precomputed by simulation.py
+@app.callback(
+    Output('probability-chart-container', 'children'),
+    [Input('team-dropdown', 'value'),
+     Input('competition-dropdown', 'value'),
+     Input('season-dropdown', 'value')]
+)
+def update_probability_chart(selected_team, competition, season):
+    snapshot = partition_snapshot(competition, season)
+    if selected_team not in snapshot.team_index:
+        raise PreventUpdate
+    figure = snapshot.probability_figure(selected_team)
+    if figure is None:
+        return html.P("No season-outcome probabilities for this season; run simulation.py to compute them.")
+    return dcc.Graph(figure=figure)
+
+# Head-to-head view for the selected team and opponent
+@app.callback(
+    Output('head-to-head', 'children'),
+    [Input('team-dropdown', 'value'),
+     Input('opponent-dropdown', 'value'),
+     Input('form-length-dropdown', 'value'),
+     Input('competition-dropdown', 'value'),
+     Input('season-dropdown', 'value')]
+)
+def update_head_to_head(selected_team, opponent, n, competition, season):
+    snapshot = partition_snapshot(competition, season)
+    pair_index = snapshot.pair_index
+    if pair_index is None:
+        return html.P("Head-to-head data is not available for this season; rerun process_data.py to build it.")
+    if selected_team not in pair_index.team_ids or opponent not in pair_index.team_ids:
+        raise PreventUpdate
+    if selected_team == opponent:
+        return html.P("Choose a different opponent.")
+    return head_to_head(pair_index, selected_team, opponent, n)
+
+if LIVE_UPDATES:
+    # Each page's timer only compares versions; the work for a new version is done
+    # once per process by the callbacks it triggers, from the live table's cache
+    @app.callback(
+        Output('live-version', 'data'),
+        [Input('live-interval', 'n_intervals')],
+        [State('competition-dropdown', 'value'),
+         State('season-dropdown', 'value'),
+         State('live-version', 'data')]
+    )
+    def poll_live_table(_, competition, season, current_version):
+        live_table = live_tables.get(competition, season)
+        version = list(live_table.version) if live_table is not None else None
+        if version == current_version:
+            raise PreventUpdate
+        return version
+
+    @app.callback(
+        Output('live-standings', 'children'),
+        [Input('live-version', 'data'),
+         Input('team-dropdown', 'value'),
+         Input('competition-dropdown', 'value'),
+         Input('season-dropdown', 'value')]
+    )
+    def update_live_standings(_, selected_team, competition, season):
+        live_table = live_tables.get(competition, season)
+        if live_table is None:
+            return None
+        return live_table.view(('standings', selected_team), lambda: live_standings_table(live_table, selected_team))
+
+if RENDER_MODE == 'client':
+    app.clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='update_team_view'),
+        TEAM_VIEW_OUTPUTS,
+        [Input('team-dropdown', 'value'),
+         Input('season-data', 'data')]
+    )
+else:
+    app.callback(
+        TEAM_VIEW_OUTPUTS,
+        [Input('team-dropdown', 'value'),
+         Input('competition-dropdown', 'value'),
+         Input('season-dropdown', 'value')] + ([Input('live-version', 'data')] if LIVE_UPDATES else [])
+    )(update_team_view)
+
 if __name__ == '__main__':
     # Use port from environment variable if available (for Render), otherwise use 8050
     port = int(os.environ.get('PORT', 8050))
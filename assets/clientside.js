@@ -0,0 +1,158 @@
+// Clientside rendering mode (RENDER_MODE=client): the season payload built by
+// figures.client_payload lives in a dcc.Store and every team switch is drawn here,
+// in the browser, without a request to the server.
+
+const TYPED_ARRAYS = {
+    int8: Int8Array,
+    int16: Int16Array,
+    int32: Int32Array,
+    float32: Float32Array,
+    float64: Float64Array
+};
+
+// Decoded columns, keyed by the payload object so each store value is decoded once
+const decodedPayloads = new WeakMap();
+
+// Base64 typed array from figures.encode_array -> plain JS array
+function decodeArray(encoded) {
+    const binary = atob(encoded.bdata);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return Array.from(new TYPED_ARRAYS[encoded.dtype](bytes.buffer));
+}
+
+function decodePayload(payload) {
+    if (!decodedPayloads.has(payload)) {
+        const columns = {};
+        Object.keys(payload.columns).forEach(function(column) {
+            columns[column] = decodeArray(payload.columns[column]);
+        });
+        const bands = {};
+        Object.keys(payload.bands).forEach(function(chart) {
+            bands[chart] = {
+                mean: decodeArray(payload.bands[chart].mean),
+                std: decodeArray(payload.bands[chart].std)
+            };
+        });
+        decodedPayloads.set(payload, {
+            offsets: decodeArray(payload.offsets),
+            columns: columns,
+            weeks: decodeArray(payload.weeks),
+            bands: bands
+        });
+    }
+    return decodedPayloads.get(payload);
+}
+
+// Average line and +/- 1 S.D. polygon, mirroring figures.league_traces
+function leagueTraces(payload, data, chart) {
+    const spec = payload.charts[chart];
+    if (spec.band === null) {
+        return [];
+    }
+    const weeks = data.weeks;
+    const std = data.bands[chart].std;
+    const center = spec.band === 'mean' ? data.bands[chart].mean : weeks.map(function() { return 0; });
+    const upper = center.map(function(value, i) { return value + std[i]; });
+    const lower = center.map(function(value, i) { return value - std[i]; });
+    const band = {
+        type: 'scatter',
+        x: weeks.concat(weeks.slice().reverse()),
+        y: upper.concat(lower.reverse()),
+        fill: 'toself',
+        fillcolor: payload.colors.std_dev,
+        line: {color: 'rgba(255,255,255,0)'},
+        name: '± 1 S.D.',
+        showlegend: true
+    };
+    if (spec.band === 'mean') {
+        const average = {type: 'scatter', x: weeks, y: center, mode: 'lines', name: 'Average', line: {color: payload.colors.average}};
+        return [average, band];
+    }
+    return [band];
+}
+
+// Figure for one team and chart, mirroring figures.build_figure
+function buildFigure(payload, data, team, start, end, chart) {
+    const spec = payload.charts[chart];
+    const traces = leagueTraces(payload, data, chart);
+    const teamTrace = {
+        type: 'scatter',
+        x: data.columns.Game_Week.slice(start, end),
+        y: data.columns[spec.column].slice(start, end),
+        mode: 'lines+markers',
+        line: {color: payload.colors.team}
+    };
+    if (spec.name !== null) {
+        teamTrace.name = spec.name;
+    }
+    traces.push(teamTrace);
+
+    const layout = {
+        template: payload.template,
+        title: {text: team + ' - ' + spec.title},
+        xaxis: {title: {text: 'Game Week'}},
+        yaxis: {title: {text: spec.yaxis_title}}
+    };
+    if (chart === 'goal_diff') {
+        layout.shapes = [{type: 'line', x0: 0, x1: 1, xref: 'x domain', y0: 0, y1: 0, yref: 'y', line: {dash: 'dot'}}];
+    }
+    if (chart === 'position') {
+        const nTeams = payload.teams.length;
+        Object.assign(layout.yaxis, {range: [nTeams + 0.5, 0.5], autorange: false, nticks: nTeams, tickmode: 'linear'});
+    }
+    return {data: traces, layout: layout};
+}
+
+// Dash component tree for the summary, mirroring app.final_summary_table
+function summaryTable(team, data, last) {
+    const columns = data.columns;
+    const items = [
+        'Team: ' + team,
+        'Final League Position: ' + columns.Position[last],
+        'Points: ' + columns.Points[last],
+        'Wins: ' + columns.Wins[last],
+        'Draws: ' + columns.Draws[last],
+        'Losses: ' + columns.Losses[last],
+        'Goals For: ' + columns.Goals_For[last],
+        'Goals Against: ' + columns.Goals_Against[last],
+        'Goal Difference: ' + columns.Goal_Diff[last]
+    ].map(function(text) {
+        return {type: 'Li', namespace: 'dash_html_components', props: {children: text}};
+    });
+    return {
+        type: 'Div',
+        namespace: 'dash_html_components',
+        props: {children: [
+            {type: 'H3', namespace: 'dash_html_components', props: {children: 'End of Season Summary'}},
+            {type: 'Ul', namespace: 'dash_html_components', props: {children: items, style: {'list-style-type': 'none', padding: '20px'}}}
+        ]}
+    };
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        // Same outputs as app.update_team_view
+        update_team_view: function(team, payload) {
+            const data = decodePayload(payload);
+            const index = payload.teams.indexOf(team);
+            if (index === -1) {
+                // Team list and payload are switching seasons; wait for both
+                return window.dash_clientside.no_update;
+            }
+            const start = data.offsets[index];
+            const end = data.offsets[index + 1];
+            return [
+                payload.crests[index],
+                buildFigure(payload, data, team, start, end, 'points'),
+                buildFigure(payload, data, team, start, end, 'goals_scored'),
+                buildFigure(payload, data, team, start, end, 'goals_conceded'),
+                buildFigure(payload, data, team, start, end, 'goal_diff'),
+                buildFigure(payload, data, team, start, end, 'position'),
+                summaryTable(team, data, end - 1)
+            ];
+        }
+    }
+});
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Figure cache shared across workers: with each backend, fresh processes standing in
+# for gunicorn workers serve every figure of a synthetic store, either one after
+# another (a cold worker joining warm siblings) or all at once (a stampede on an
+# empty cache). Reports, per worker, the time to serve everything, how many values
+# it computed itself and the memory it owns afterwards.
+
+# Runs inside a fresh worker process, with the backend chosen through CACHE_* variables
+def serve_everything(store_dir):
+    from benchmarks.bench_startup import process_memory_mb
+    start = time.perf_counter()
+    from data_provider import PartitionProviders, cache
+    from figures import CHARTS
+    from storage import list_partitions
+    providers = PartitionProviders(store_dir)
+    for competition, season in list_partitions(store_dir=store_dir):
+        snapshot = providers.get(competition, season)
+        for team in snapshot.teams:
+            for chart in CHARTS:
+                snapshot.figure(team, chart)
+            snapshot.probability_figure(team)
+        snapshot.client_payload()
+    return dict(cache.stats, seconds=time.perf_counter() - start, uss_mb=process_memory_mb(os.getpid())['uss_mb'])
+
+def run_workers(env, store_dir, workers, concurrent):
+    command = [sys.executable, '-m', 'benchmarks.bench_cache', '--child', store_dir]
+    if concurrent:
+        processes = [subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True) for _ in range(workers)]
+        outputs = [process.communicate()[0] for process in processes]
+    else:
+        outputs = [subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+                   for _ in range(workers)]
+    return [json.loads(output.splitlines()[-1]) for output in outputs]
+
+def summarize_workers(runs):
+    return {
+        'first_worker_s': runs[0]['seconds'],
+        'later_workers_s': statistics.median(run['seconds'] for run in runs[1:]) if len(runs) > 1 else None,
+        'computed': sum(run['misses'] for run in runs),
+        'waited': sum(run['waits'] for run in runs),
+        'hit_rate': sum(run['hits'] for run in runs) / sum(run['hits'] + run['misses'] for run in runs),
+        'worker_uss_mb': statistics.mean(run['uss_mb'] for run in runs),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Figure cache hit rates and worker memory per cache backend.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--seasons', type=int, default=3)
+    parser.add_argument('--redis-url', help='also measure the redis backend against this server')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(serve_everything(args.child)))
+        sys.exit()
+
+    from benchmarks.synthetic import write_synthetic_store
+    backends = {'memory': {}, 'disk': {}}
+    if args.redis_url:
+        backends['redis'] = {'CACHE_URL': args.redis_url}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store_dir = os.path.join(tmp_dir, 'store')
+        write_synthetic_store(store_dir, args.teams, args.seasons)
+        for backend, settings in backends.items():
+            for mode in ('sequential', 'concurrent'):
+                env = dict(os.environ, CACHE_BACKEND=backend, CACHE_DIR=os.path.join(tmp_dir, f'cache-{mode}'),
+                           **settings)
+                if backend == 'redis':
+                    from cache import RedisCache
+                    redis_cache = RedisCache.from_url(args.redis_url)
+                    for key in redis_cache.client.scan_iter(redis_cache.prefix + '*'):
+                        redis_cache.client.delete(key)
+                results[f'{backend}_{mode}'] = summarize_workers(
+                    run_workers(env, store_dir, args.workers, mode == 'concurrent'))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit()
+
+    for name, result in results.items():
+        print(name)
+        for key, value in result.items():
+            print(f"  {key:<16} {value:.3f}" if isinstance(value, float) else f"  {key:<16} {value}")
@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from benchmarks.load_test import UPDATE_PATH, callback_body, find_callbacks
+
+# Bytes sent for a first page load and for a team switch, with full and slimmed
+# figures (SLIM_FIGURES) and each content encoding, plus the time to interactive they
+# imply on slow links. Each figure setting is measured in a fresh process, since the
+# setting is read when the app is imported.
+
+ENCODINGS = ['identity', 'gzip', 'br']
+
+# Links to estimate time to interactive on: (name, bandwidth in Mbit/s, round trip in ms)
+LINKS = [('slow 3G', 0.4, 400), ('fast 3G', 1.6, 150), ('4G', 10, 50)]
+
+# Round trips before the first byte of a page load (TCP, TLS) and how many requests the
+# browser runs at once; each wave of requests costs one more round trip
+PAGE_SETUP_ROUND_TRIPS = 3
+PARALLEL_REQUESTS = 6
+
+# Callbacks a team switch fires, and the ones that also run when the page first loads
+TEAM_SWITCH = ['team_view', 'head_to_head', 'probability']
+PAGE_CALLBACKS = ['partition', 'team_view', 'head_to_head', 'probability']
+
+def payload_callbacks(dependencies):
+    callbacks = find_callbacks(dependencies)
+    for dependency in dependencies:
+        if not dependency.get('clientside_function') and 'probability-chart-container.children' in dependency['output']:
+            callbacks['probability'] = dependency
+    return callbacks
+
+# Script and stylesheet URLs the index page loads from this server
+def page_resources(html):
+    return re.findall(r'<(?:script|link)[^>]+(?:src|href)="(/[^"]+)"', html)
+
+# Response sizes under every encoding, from the uncompressed body (compression is
+# applied here rather than by the server so all encodings come from one response)
+def encoded_sizes(data):
+    from compression import compress
+    sizes = {'identity': len(data)}
+    for encoding in ENCODINGS[1:]:
+        start = time.perf_counter()
+        sizes[encoding] = len(compress(data, encoding))
+        sizes[f'{encoding}_ms'] = (time.perf_counter() - start) * 1e3
+    return sizes
+
+# Runs inside the child process: the in-process app with compression off
+def measure(competition, season, team, opponent):
+    import app
+    client = app.server.test_client()
+    dependencies = client.get('/_dash-dependencies').get_json()
+    callbacks = payload_callbacks(dependencies)
+    values = {'competition-dropdown': competition, 'season-dropdown': season, 'team-dropdown': team,
+              'opponent-dropdown': opponent, 'form-length-dropdown': 5}
+
+    index = client.get('/')
+    page = {'/': index.data, '/_dash-layout': client.get('/_dash-layout').data,
+            '/_dash-dependencies': client.get('/_dash-dependencies').data}
+    for path in page_resources(index.get_data(as_text=True)):
+        response = client.get(path)
+        if response.status_code == 200:
+            page[path] = response.get_data()
+    responses = {}
+    for name in PAGE_CALLBACKS:
+        if name in callbacks:
+            responses[name] = client.post(UPDATE_PATH, json=callback_body(callbacks[name], values)).data
+
+    return {
+        'page_static': {path: encoded_sizes(data) for path, data in page.items()},
+        'callbacks': {name: encoded_sizes(data) for name, data in responses.items()},
+    }
+
+def run_child(slim, args):
+    env = dict(os.environ, SLIM_FIGURES='1' if slim else '0', COMPRESS_RESPONSES='0')
+    if args.store:
+        env['DATA_STORE_DIR'] = args.store
+    command = [sys.executable, '-m', 'benchmarks.bench_payload', '--child', '--competition', args.competition,
+               '--season', str(args.season), '--team', args.team, '--opponent', args.opponent]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+# Seconds until the page is usable: setup round trips, one round trip per wave of
+# parallel requests, then transfer time for every byte
+def time_to_interactive(total_bytes, n_requests, bandwidth_mbps, rtt_ms, setup_round_trips):
+    waves = -(-n_requests // PARALLEL_REQUESTS)
+    return (setup_round_trips + waves) * rtt_ms / 1e3 + total_bytes * 8 / (bandwidth_mbps * 1e6)
+
+def totals(sizes_by_path, names=None):
+    items = [sizes for name, sizes in sizes_by_path.items() if names is None or name in names]
+    return {encoding: sum(sizes[encoding] for sizes in items) for encoding in ENCODINGS}, len(items)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Payload size and estimated time to interactive.')
+    parser.add_argument('--store', help='store directory (default: the app\'s)')
+    parser.add_argument('--competition', default='PL')
+    parser.add_argument('--season', type=int, default=2023)
+    parser.add_argument('--team', default='Arsenal FC')
+    parser.add_argument('--opponent', default='Chelsea FC')
+    parser.add_argument('--json', action='store_true', help='print the raw measurements as JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.competition, args.season, args.team, args.opponent)))
+        sys.exit()
+
+    results = {'full': run_child(False, args), 'slim': run_child(True, args)}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit()
+
+    print('Callback responses (bytes): ' + '  '.join(f'{encoding:>10}' for encoding in ENCODINGS))
+    for name in PAGE_CALLBACKS:
+        for figures, result in results.items():
+            sizes = result['callbacks'].get(name)
+            if sizes:
+                print(f"  {name + ' (' + figures + ')':<28}" + '  '.join(f'{sizes[encoding]:>10,}' for encoding in ENCODINGS)
+                      + f"   br {sizes['br_ms']:.2f} ms, gzip {sizes['gzip_ms']:.2f} ms")
+
+    print('\nEstimated time to interactive (s): ' + '  '.join(f'{name:>8}' for name, _, _ in LINKS))
+    for figures, result in results.items():
+        static, n_static = totals(result['page_static'])
+        page_callbacks, n_page_callbacks = totals(result['callbacks'], PAGE_CALLBACKS)
+        switch, n_switch = totals(result['callbacks'], TEAM_SWITCH)
+        for encoding in ENCODINGS:
+            page_bytes = static[encoding] + page_callbacks[encoding]
+            page = [time_to_interactive(page_bytes, n_static + n_page_callbacks, bandwidth, rtt, PAGE_SETUP_ROUND_TRIPS)
+                    for _, bandwidth, rtt in LINKS]
+            team = [time_to_interactive(switch[encoding], n_switch, bandwidth, rtt, 0) for _, bandwidth, rtt in LINKS]
+            print(f"  page load, {figures}, {encoding:<8} {page_bytes:>10,} B  " + '  '.join(f'{value:8.2f}' for value in page))
+            print(f"  team switch, {figures}, {encoding:<8} {switch[encoding]:>8,} B  " + '  '.join(f'{value:8.2f}' for value in team))
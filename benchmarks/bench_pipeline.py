@@ -0,0 +1,63 @@
+import argparse
+import os
+import tempfile
+
+from benchmarks.harness import add_baseline_arguments, finish, measure, summarize
+from benchmarks.synthetic import generate_matches
+from aggregates import build_aggregates, load_aggregates, team_frames, write_aggregates
+from data_provider import Snapshot
+from figures import CHARTS, build_figure, client_payload, league_traces
+from process_data import assign_game_weeks, calculate_points_and_standings, load_data
+from storage import read_table, write_partition
+
+# Microbenchmarks for each pipeline stage and figure builder on synthetic data:
+# n_seasons seasons of n_teams teams for the data stages, one season for the figures
+def run(n_teams, n_seasons, repeat):
+    matches_df = generate_matches(n_teams, n_seasons)
+    raw_df = matches_df.drop(columns='Game_Week')
+    standings_df = calculate_points_and_standings(matches_df, by=['Season'])
+    season_df = standings_df[standings_df['Season'] == 0].drop(columns='Season').reset_index(drop=True)
+    snapshot = Snapshot(season_df, version=None)
+    team = snapshot.teams[0]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'matches.csv')
+        raw_df.to_csv(csv_path, index=False)
+        arrow_path = write_partition(season_df, 'SYN', 2000, 'standings', tmp_dir)
+        aggregates_path = write_aggregates(snapshot.aggregates, os.path.join(tmp_dir, 'aggregates.npz'), arrow_path)
+
+        stages = {
+            'load_data': lambda: load_data(csv_path),
+            'assign_game_weeks': lambda: assign_game_weeks(raw_df.copy(), by=['Season']),
+            'calculate_points_and_standings': lambda: calculate_points_and_standings(matches_df, by=['Season']),
+            'write_partition': lambda: write_partition(season_df, 'SYN', 2001, 'standings', tmp_dir),
+            'read_table': lambda: read_table(arrow_path),
+            'build_aggregates': lambda: build_aggregates(season_df),
+            'load_aggregates': lambda: load_aggregates(aggregates_path, arrow_path),
+            'team_frames': lambda: team_frames(snapshot.aggregates),
+            'snapshot': lambda: Snapshot(season_df, version=None),
+            'league_traces': lambda: league_traces(snapshot.aggregates),
+            'client_payload': lambda: client_payload(snapshot.aggregates),
+        }
+        for chart in CHARTS:
+            stages[f'build_figure[{chart}]'] = (
+                lambda chart=chart: build_figure(team, chart, snapshot.team_index[team], snapshot.traces, len(snapshot.teams)))
+            stages[f'figure_json[{chart}]'] = (
+                lambda chart=chart: build_figure(team, chart, snapshot.team_index[team], snapshot.traces,
+                                                 len(snapshot.teams)).to_plotly_json())
+
+        for name, func in stages.items():
+            results[name] = summarize(measure(func, repeat))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Microbenchmarks for the data pipeline and figure builders.')
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--seasons', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"{args.teams} teams x {args.seasons} seasons, {args.repeat} runs per benchmark")
+    finish('pipeline', run(args.teams, args.seasons, args.repeat), args)
@@ -0,0 +1,83 @@
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_matches
+from process_data import calculate_points_and_standings
+
+# Reference implementation: the original per-match iterrows loop, kept for timing and checking
+def legacy_standings(matches_df):
+    standings = []
+    teams_stats = {}
+    matches_df = matches_df.sort_values('Game_Week')
+    for game_week in sorted(matches_df['Game_Week'].unique()):
+        week_matches = matches_df[matches_df['Game_Week'] == game_week]
+        for idx, match in week_matches.iterrows():
+            home_team, away_team = match['Home_Team'], match['Away_Team']
+            home_score, away_score = match['Home_Score'], match['Away_Score']
+            for team in (home_team, away_team):
+                if team not in teams_stats:
+                    teams_stats[team] = {'points': 0, 'wins': 0, 'draws': 0, 'losses': 0,
+                                         'goals_for': 0, 'goals_against': 0, 'goal_diff': 0}
+            if home_score > away_score:
+                teams_stats[home_team]['points'] += 3
+                teams_stats[home_team]['wins'] += 1
+                teams_stats[away_team]['losses'] += 1
+            elif home_score < away_score:
+                teams_stats[away_team]['points'] += 3
+                teams_stats[away_team]['wins'] += 1
+                teams_stats[home_team]['losses'] += 1
+            else:
+                teams_stats[home_team]['points'] += 1
+                teams_stats[away_team]['points'] += 1
+                teams_stats[home_team]['draws'] += 1
+                teams_stats[away_team]['draws'] += 1
+            teams_stats[home_team]['goals_for'] += home_score
+            teams_stats[home_team]['goals_against'] += away_score
+            teams_stats[away_team]['goals_for'] += away_score
+            teams_stats[away_team]['goals_against'] += home_score
+            for team in (home_team, away_team):
+                teams_stats[team]['goal_diff'] = teams_stats[team]['goals_for'] - teams_stats[team]['goals_against']
+        sorted_teams = sorted(teams_stats.items(), key=lambda x: (x[1]['points'], x[1]['goal_diff'], x[1]['goals_for']), reverse=True)
+        for position, (team, stats) in enumerate(sorted_teams, 1):
+            standings.append({'Team': team, 'Game_Week': game_week, 'Position': position,
+                              'Points': stats['points'], 'Wins': stats['wins'], 'Draws': stats['draws'],
+                              'Losses': stats['losses'], 'Goals_For': stats['goals_for'],
+                              'Goals_Against': stats['goals_against'], 'Goal_Diff': stats['goal_diff']})
+    return pd.DataFrame(standings)
+
+# Best wall time of `repeat` runs
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized standings engine.')
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--seasons', type=int, default=1000)
+    parser.add_argument('--legacy-seasons', type=int, default=5, help='seasons timed with the original loop')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    matches_df = generate_matches(args.teams, args.seasons)
+    print(f"{len(matches_df):,} matches ({args.teams} teams x {args.seasons} seasons)")
+
+    # Correctness: every season must match the original loop exactly
+    for season in range(min(args.legacy_seasons, args.seasons)):
+        season_df = matches_df[matches_df['Season'] == season]
+        expected = legacy_standings(season_df)
+        actual = calculate_points_and_standings(season_df)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+    sample = matches_df[matches_df['Season'] < args.legacy_seasons]
+    legacy = best_of(lambda: [legacy_standings(df) for _, df in sample.groupby('Season')], 1) / args.legacy_seasons
+    vectorized = best_of(lambda: calculate_points_and_standings(matches_df, by=['Season']), args.repeat)
+
+    print(f"legacy loop:     {legacy * 1e3:8.1f} ms/season (measured on {args.legacy_seasons} seasons)")
+    print(f"vectorized:      {vectorized / args.seasons * 1e3:8.3f} ms/season ({vectorized:.2f} s total)")
+    print(f"speedup:         {legacy * args.seasons / vectorized:8.0f}x")
@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+# Cold start of the app: how long a fresh process takes to import it and answer its
+# first requests, and, under gunicorn with and without preload_app, how long each
+# worker takes from fork to ready and how much memory each worker really owns.
+# Worker readiness comes from the log line gunicorn.conf.py writes in post_worker_init.
+
+# Modules whose import dominates start-up, reported when already loaded after `import app`
+HEAVY_MODULES = ['pandas', 'pyarrow', 'plotly.graph_objects', 'dash_bootstrap_templates']
+
+READY_LINE = re.compile(r'Worker (\d+) ready in ([\d.]+)s')
+
+# Runs inside a fresh child process, which imports nothing but the standard library
+# before the app (the benchmark helpers import pandas)
+def measure_cold_start(competition, season, team):
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    from benchmarks.harness import peak_rss_mb
+    from benchmarks.load_test import UPDATE_PATH, callback_body, find_callbacks
+    import_rss = peak_rss_mb()
+    client = app.server.test_client()
+    client.get('/_dash-layout')
+    layout = time.perf_counter()
+    dependencies = client.get('/_dash-dependencies').get_json()
+    values = {'competition-dropdown': competition, 'season-dropdown': season, 'team-dropdown': team}
+    client.post(UPDATE_PATH, json=callback_body(find_callbacks(dependencies)['team_view'], values))
+    team_view = time.perf_counter()
+    return {'import_s': imported - start, 'first_layout_s': layout - start, 'first_team_view_s': team_view - start,
+            'import_rss_mb': import_rss, 'rss_mb': peak_rss_mb(), 'heavy_modules_at_import': loaded}
+
+def cold_start(env, args):
+    command = [sys.executable, '-m', 'benchmarks.bench_startup', '--child', '--competition', args.competition,
+               '--season', str(args.season), '--team', args.team]
+    runs = [json.loads(subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout.splitlines()[-1])
+            for _ in range(args.repeat)]
+    result = {key: statistics.median(run[key] for run in runs) for key in runs[0] if key.endswith(('_s', '_mb'))}
+    result['heavy_modules_at_import'] = runs[0]['heavy_modules_at_import']
+    return result
+
+# Resident, proportional (shared pages split between the processes mapping them) and
+# unique (private) memory of a process in MB, from /proc/<pid>/smaps_rollup (Linux only)
+def process_memory_mb(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {'rss_mb': fields['Rss'], 'pss_mb': fields['Pss'],
+            'uss_mb': fields['Private_Clean'] + fields['Private_Dirty']}
+
+# Collects "Worker <pid> ready in <s>" lines from gunicorn's log as they arrive
+class ReadyLog:
+    def __init__(self, stream):
+        self.ready = []
+        self.condition = threading.Condition()
+        threading.Thread(target=self._read, args=(stream,), daemon=True).start()
+
+    def _read(self, stream):
+        for line in stream:
+            match = READY_LINE.search(line)
+            if match:
+                with self.condition:
+                    self.ready.append((int(match.group(1)), float(match.group(2))))
+                    self.condition.notify_all()
+
+    def wait_for(self, count, process, timeout=120):
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while len(self.ready) < count:
+                if process.poll() is not None:
+                    raise RuntimeError('gunicorn exited during startup')
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'only {len(self.ready)} of {count} workers became ready within {timeout}s')
+                self.condition.wait(0.5)
+            return self.ready[:count]
+
+def gunicorn_run(workers, preload, env, args):
+    import requests
+    from benchmarks.load_test import UPDATE_PATH, callback_body, find_callbacks, free_port
+
+    env = dict(env, GUNICORN_PRELOAD='1' if preload else '0')
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:server', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+         '--log-level', 'info'],
+        env=env, stderr=subprocess.PIPE, text=True)
+    log = ReadyLog(process.stderr)
+    try:
+        booted = log.wait_for(workers, process)
+        all_ready = time.perf_counter() - start
+
+        # Every worker serves a few team views, so each holds the data it needs to answer them
+        url = f'http://127.0.0.1:{port}'
+        session = requests.Session()
+        dependencies = session.get(url + '/_dash-dependencies').json()
+        team_view = find_callbacks(dependencies)['team_view']
+        values = {'competition-dropdown': args.competition, 'season-dropdown': args.season, 'team-dropdown': args.team}
+        for _ in range(args.requests):
+            session.post(url + UPDATE_PATH, json=callback_body(team_view, values), headers={'Connection': 'close'})
+
+        memory = {pid: process_memory_mb(pid) for pid, _ in booted}
+        master = process_memory_mb(process.pid)
+
+        # A replacement worker after a crash: fork to ready
+        os.kill(booted[0][0], signal.SIGKILL)
+        respawn = log.wait_for(workers + 1, process)[-1][1]
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        'all_workers_ready_s': all_ready,
+        'worker_ready_s': statistics.median(seconds for _, seconds in booted),
+        'respawned_worker_ready_s': respawn,
+        'master_rss_mb': master['rss_mb'],
+        'worker_rss_mb': statistics.mean(value['rss_mb'] for value in memory.values()),
+        'worker_pss_mb': statistics.mean(value['pss_mb'] for value in memory.values()),
+        'worker_uss_mb': statistics.mean(value['uss_mb'] for value in memory.values()),
+        'total_pss_mb': master['pss_mb'] + sum(value['pss_mb'] for value in memory.values()),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cold-start time and per-worker memory of the app.')
+    parser.add_argument('--competition', default='PL')
+    parser.add_argument('--season', type=int, default=2023)
+    parser.add_argument('--team', default='Arsenal FC')
+    parser.add_argument('--store', help='store directory (default: the app\'s)')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh processes per cold-start measurement')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=40, help='team views served before memory is read')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_cold_start(args.competition, args.season, args.team)))
+        sys.exit()
+
+    env = dict(os.environ)
+    if args.store:
+        env['DATA_STORE_DIR'] = args.store
+    results = {
+        'cold_start': cold_start(dict(env, STARTUP_SNAPSHOT='1'), args),
+        'cold_start_without_snapshot': cold_start(dict(env, STARTUP_SNAPSHOT='0'), args),
+        'gunicorn': gunicorn_run(args.workers, False, env, args),
+        'gunicorn_preload': gunicorn_run(args.workers, True, env, args),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit()
+
+    for name, result in results.items():
+        print(name)
+        for key, value in result.items():
+            print(f"  {key:<26} {value:.3f}" if isinstance(value, float) else f"  {key:<26} {value}")
@@ -0,0 +1,97 @@
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+# Saved benchmark results, one JSON file per suite (machine-specific, not committed)
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+# A result this much slower than its baseline is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+# Wall time of each of `repeat` calls, after `warmup` untimed calls
+def measure(func, repeat=20, warmup=1):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+# Latency percentiles in milliseconds
+def summarize(timings):
+    timings_ms = np.asarray(timings) * 1e3
+    p50, p95, p99 = np.percentile(timings_ms, [50, 95, 99])
+    return {'n': len(timings_ms), 'mean_ms': float(timings_ms.mean()), 'min_ms': float(timings_ms.min()),
+            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+# Peak resident set size of this process so far, in MB (ru_maxrss is KB on Linux, bytes on macOS)
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def environment():
+    import pandas as pd
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+def baseline_path(suite, baseline_dir=BASELINE_DIR):
+    return os.path.join(baseline_dir, f'{suite}.json')
+
+def save_baseline(suite, results, baseline_dir=BASELINE_DIR):
+    os.makedirs(baseline_dir, exist_ok=True)
+    path = baseline_path(suite, baseline_dir)
+    with open(path, 'w') as f:
+        json.dump({'suite': suite, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'environment': environment(),
+                   'peak_rss_mb': peak_rss_mb(), 'results': results}, f, indent=2)
+    return path
+
+def load_baseline(suite, baseline_dir=BASELINE_DIR):
+    path = baseline_path(suite, baseline_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)['results']
+
+# Print one line per benchmark, with the change in p50 against the baseline when there is one.
+# Returns the names of benchmarks whose p50 regressed by more than `threshold`.
+def report(results, baseline=None, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        line = f"{name:<{width}}  p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms"
+        if 'throughput_rps' in result:
+            line += f"  {result['throughput_rps']:8.1f} req/s"
+        previous = (baseline or {}).get(name)
+        if previous:
+            change = result['p50_ms'] / previous['p50_ms'] - 1
+            line += f"  {change:+7.1%} vs baseline"
+            if change > threshold:
+                regressions.append(name)
+                line += '  REGRESSION'
+        print(line)
+    return regressions
+
+# Shared command-line handling: print the report, compare against and optionally replace the baseline
+def finish(suite, results, args):
+    baseline = None if args.no_compare else load_baseline(suite, args.baseline_dir)
+    regressions = report(results, baseline, args.threshold)
+    print(f"peak RSS: {peak_rss_mb():.1f} MB")
+    if args.save_baseline:
+        print(f"baseline saved to {save_baseline(suite, results, args.baseline_dir)}")
+    if regressions and args.fail_on_regression:
+        sys.exit(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+def add_baseline_arguments(parser):
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--no-compare', action='store_true', help='do not compare against the saved baseline')
+    parser.add_argument('--baseline-dir', default=BASELINE_DIR)
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='relative p50 slowdown reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit non-zero on any regression')
@@ -0,0 +1,224 @@
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.harness import add_baseline_arguments, finish, summarize
+from benchmarks.synthetic import write_synthetic_store
+
+# Load test of the Dash callback endpoint. Dropdown interactions (team switches and
+# season switches) are replayed against /_dash-update-component, either in-process
+# through the Flask test client or over HTTP against a local gunicorn, using a
+# synthetic store so no network or downloaded data is needed.
+
+UPDATE_PATH = '/_dash-update-component'
+
+# Request body for one callback, in the shape the Dash renderer posts
+def callback_body(dependency, values):
+    output = dependency['output']
+    if output.startswith('..'):
+        outputs = [dict(zip(('id', 'property'), part.split('.'))) for part in output.strip('.').split('...')]
+    else:
+        outputs = dict(zip(('id', 'property'), output.split('.')))
+    trigger = dependency['inputs'][0]
+    return {
+        'output': output,
+        'outputs': outputs,
+        'inputs': [dict(item, value=values[item['id']]) for item in dependency['inputs']],
+        'state': [dict(item, value=values[item['id']]) for item in dependency['state']],
+        'changedPropIds': [f"{trigger['id']}.{trigger['property']}"],
+    }
+
+# The server-side team view and partition callbacks from the app's dependency list
+def find_callbacks(dependencies):
+    callbacks = {}
+    for dependency in dependencies:
+        if dependency.get('clientside_function'):
+            continue
+        if 'club-crest.src' in dependency['output']:
+            callbacks['team_view'] = dependency
+        elif 'team-dropdown.options' in dependency['output']:
+            callbacks['partition'] = dependency
+        elif 'head-to-head.children' in dependency['output']:
+            callbacks['head_to_head'] = dependency
+    return callbacks
+
+# Random interaction mix: mostly team switches within a season (each redrawing the
+# team view and the head-to-head view), some season switches
+def interactions(partitions, teams, n_requests, partition_share, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n_requests):
+        competition, season = rng.choice(partitions)
+        team, opponent = rng.sample(teams[(competition, season)], 2)
+        values = {'competition-dropdown': competition, 'season-dropdown': season,
+                  'team-dropdown': team, 'opponent-dropdown': opponent, 'form-length-dropdown': 5}
+        if rng.random() < partition_share:
+            yield 'partition', values
+        else:
+            yield 'team_view', values
+            yield 'head_to_head', values
+
+# Client for the in-process app (Flask test client) or a server at `url`, one per thread
+def make_client(url):
+    if url is None:
+        import app
+        client = app.server.test_client()
+        return lambda path, body=None: (client.post(path, json=body) if body is not None else client.get(path)).status_code
+    import requests
+    session = requests.Session()
+    return lambda path, body=None: (session.post(url + path, json=body) if body is not None else session.get(url + path)).status_code
+
+# Replay the interactions on `concurrency` threads; per-callback latencies and overall throughput
+def run_load(url, partitions, teams, n_requests, concurrency, partition_share, dependencies):
+    callbacks = find_callbacks(dependencies)
+    work = list(interactions(partitions, teams, n_requests, partition_share))
+    chunks = [work[i::concurrency] for i in range(concurrency)]
+    timings = {name: [] for name in callbacks}
+    errors = []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        post = make_client(url)
+        local = {name: [] for name in callbacks}
+        for name, values in chunk:
+            body = callback_body(callbacks[name], values)
+            start = time.perf_counter()
+            status = post(UPDATE_PATH, body)
+            local[name].append(time.perf_counter() - start)
+            if status not in (200, 204):
+                errors.append((name, status))
+        with lock:
+            for name, values in local.items():
+                timings[name].extend(values)
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for name, values in timings.items():
+        if values:
+            results[name] = dict(summarize(values), throughput_rps=len(values) / elapsed)
+    all_timings = [value for values in timings.values() for value in values]
+    results['all'] = dict(summarize(all_timings), throughput_rps=len(all_timings) / elapsed, errors=len(errors))
+    return results
+
+# Peak RSS (VmHWM) of a process and its direct children, in MB, from /proc (Linux only)
+def process_tree_peak_rss_mb(pid):
+    def vm_hwm(process_id):
+        try:
+            with open(f'/proc/{process_id}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return 0.0
+
+    peaks = {'master': vm_hwm(pid)}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if parent == pid:
+                peaks[f'worker {entry}'] = vm_hwm(int(entry))
+    return peaks
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+# Start `gunicorn app:server` on a free local port and wait until it answers
+def start_gunicorn(workers, threads, env):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:server', '--workers', str(workers), '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        env=env)
+    url = f'http://127.0.0.1:{port}'
+    import requests
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url + '/_dash-layout', timeout=10)
+            return process, url
+        except requests.RequestException:
+            if process.poll() is not None:
+                raise RuntimeError('gunicorn exited during startup')
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start within 60s')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test of the Dash callback endpoint.')
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--seasons', type=int, default=5)
+    parser.add_argument('--store', help='existing store directory to use instead of a synthetic one')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=4, help='client threads')
+    parser.add_argument('--partition-share', type=float, default=0.1,
+                        help='fraction of interactions that switch season rather than team')
+    parser.add_argument('--gunicorn', type=int, metavar='WORKERS',
+                        help='serve with a local gunicorn with this many workers instead of the test client')
+    parser.add_argument('--gunicorn-threads', type=int, default=1)
+    parser.add_argument('--url', help='already running server to test (must serve the same store)')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The app reads its store and default competition from the environment at import,
+        # so this has to happen before anything imports storage
+        store_dir = args.store or tmp_dir
+        os.environ['DATA_STORE_DIR'] = store_dir
+        if args.store is None:
+            write_synthetic_store(store_dir, args.teams, args.seasons)
+
+        from storage import list_partitions, read_partition
+        partitions = list_partitions(store_dir=store_dir)
+        os.environ.setdefault('DEFAULT_COMPETITION', partitions[0][0])
+        teams = {partition: sorted(read_partition(*partition, store_dir=store_dir)['Team'].unique())
+                 for partition in partitions}
+
+        server = None
+        url = args.url
+        if args.gunicorn:
+            server, url = start_gunicorn(args.gunicorn, args.gunicorn_threads, dict(os.environ))
+        try:
+            if url is None:
+                import app
+                dependencies = app.server.test_client().get('/_dash-dependencies').get_json()
+            else:
+                import requests
+                dependencies = requests.get(url + '/_dash-dependencies').json()
+
+            target = url or 'Flask test client'
+            print(f"{len(partitions)} partition(s), {args.requests} requests on {args.concurrency} thread(s) against {target}")
+            results = run_load(url, partitions, teams, args.requests, args.concurrency,
+                               args.partition_share, dependencies)
+            if server is not None:
+                server_rss = process_tree_peak_rss_mb(server.pid)
+                results['all']['server_peak_rss_mb'] = server_rss
+                for process, peak in server_rss.items():
+                    print(f"gunicorn {process} peak RSS: {peak:.1f} MB")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+        if results['all']['errors']:
+            print(f"{results['all']['errors']} request(s) failed")
+        suite = 'load_gunicorn' if args.gunicorn else 'load' if url is None else 'load_url'
+        finish(suite, results, args)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# Double round-robin fixture list (circle method): returns (week, home, away) index arrays
+def round_robin_schedule(n_teams):
+    teams = list(range(n_teams))
+    weeks, homes, aways = [], [], []
+    for round_number in range(n_teams - 1):
+        for i in range(n_teams // 2):
+            home, away = teams[i], teams[n_teams - 1 - i]
+            if round_number % 2:
+                home, away = away, home
+            weeks.append(round_number + 1)
+            homes.append(home)
+            aways.append(away)
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+
+    # Second half of the season mirrors the first with home and away swapped
+    weeks = np.array(weeks + [week + n_teams - 1 for week in weeks])
+    homes, aways = np.array(homes + aways), np.array(aways + homes)
+    return weeks, homes, aways
+
+# Synthetic match table in the shape of data/football_matches.csv, plus Season and Game_Week
+def generate_matches(n_teams=20, n_seasons=1, seed=0):
+    rng = np.random.default_rng(seed)
+    weeks, homes, aways = round_robin_schedule(n_teams)
+    per_season = len(weeks)
+    n_matches = per_season * n_seasons
+
+    team_names = np.array([f'Team {i + 1:02d} FC' for i in range(n_teams)], dtype=object)
+    seasons = np.repeat(np.arange(n_seasons), per_season)
+    season_weeks = np.tile(weeks, n_seasons)
+    dates = (pd.Timestamp('2000-08-12', tz='UTC')
+             + pd.to_timedelta(seasons * 365 + (season_weeks - 1) * 7, unit='D')
+             + pd.to_timedelta(np.tile(np.arange(per_season) % (n_teams // 2), n_seasons), unit='h'))
+
+    return pd.DataFrame({
+        'Match_ID': np.arange(n_matches),
+        'Season': seasons,
+        'Date': dates.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'Home_Team': team_names[np.tile(homes, n_seasons)],
+        'Away_Team': team_names[np.tile(aways, n_seasons)],
+        'Home_Score': rng.poisson(1.5, n_matches),
+        'Away_Score': rng.poisson(1.2, n_matches),
+        'Status': 'FINISHED',
+        'Game_Week': season_weeks,
+    })
+
+# Run the synthetic seasons through the pipeline and write one store partition per
+# season (competition `competition`, seasons first_season, first_season + 1, ...)
+def write_synthetic_store(store_dir, n_teams=20, n_seasons=1, competition='SYN', first_season=2000, seed=0):
+    from process_data import calculate_points_and_standings, write_to_store
+
+    matches_df = generate_matches(n_teams, n_seasons, seed)
+    standings_df = calculate_points_and_standings(matches_df, by=['Season'])
+    for season, season_matches in matches_df.groupby('Season'):
+        season_standings = standings_df[standings_df['Season'] == season].drop(columns='Season')
+        write_to_store(season_matches.drop(columns='Season'), season_standings, competition,
+                       first_season + season, store_dir)
+    return [(competition, first_season + season) for season in range(n_seasons)]
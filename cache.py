@@ -0,0 +1,317 @@
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Cache for figures, clientside payloads and derived datasets, keyed on
+# (dataset, dataset version, team, chart). Three backends share one interface:
+#   memory  in-process LRU (the default): fastest, but each worker has its own
+#   disk    files in a directory shared by every worker on the machine, read through mmap
+#   redis   any Redis-compatible server, shared by every machine
+# Every backend is bounded in size and lets only one caller compute a missing
+# value (get_or_compute); the others wait for it instead of computing it again.
+# Values are pickled, so only point the disk and Redis backends at storage the
+# app's own workers write.
+
+# Backend settings: CACHE_BACKEND is memory, disk or redis; CACHE_URL is the Redis
+# server (memory:// uses the in-process stand-in)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_MAX_MB = float(os.environ.get('CACHE_MAX_MB', 256))
+CACHE_DIR = os.environ.get('CACHE_DIR', 'data/cache')
+CACHE_URL = os.environ.get('CACHE_URL', 'redis://localhost:6379/0')
+
+# Seconds a computing caller holds a key's lock before waiters give up and compute it
+# themselves, and how often they check for the value meanwhile
+LOCK_TIMEOUT = 30.0
+POLL_INTERVAL = 0.005
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() for a missing key, since None is a valid cached value
+MISSING = object()
+
+# Cache key of one (dataset, version, team, chart) entry; the version is any repr-able stamp
+def cache_key(dataset, version, team=None, chart=None):
+    digest = hashlib.sha1(repr((dataset, version)).encode()).hexdigest()[:16]
+    return f'{digest}:{team}:{chart}'
+
+# Shared get-or-compute logic; backends provide get, set and a per-key lock
+class Cache:
+    def __init__(self):
+        # misses: values computed here; waits: misses that waited for another caller's value
+        self.stats = {'hits': 0, 'misses': 0, 'waits': 0}
+
+    # The cached value for `key`, or compute() stored under it. While one caller
+    # computes a key, others poll for its value rather than computing it too.
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is not MISSING:
+            self.stats['hits'] += 1
+            return value
+
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        waited = False
+        while not self._lock(key):
+            if not waited:
+                self.stats['waits'] += 1
+                waited = True
+            time.sleep(POLL_INTERVAL)
+            value = self.get(key)
+            if value is not MISSING:
+                self.stats['hits'] += 1
+                return value
+            if time.monotonic() > deadline:
+                logger.warning("Waited %.0fs for %s; computing it here", LOCK_TIMEOUT, key)
+                break
+        else:
+            try:
+                value = self.get(key)
+                if value is not MISSING:
+                    self.stats['hits'] += 1
+                    return value
+                return self._compute(key, compute)
+            finally:
+                self._unlock(key)
+        return self._compute(key, compute)
+
+    def _compute(self, key, compute):
+        self.stats['misses'] += 1
+        value = compute()
+        self.set(key, value)
+        return value
+
+# In-process LRU bounded by the pickled size of its values
+class MemoryCache(Cache):
+    def __init__(self, max_bytes):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._mutex = threading.Lock()
+        self._locks = {}
+
+    def get(self, key):
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._mutex:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def _lock(self, key):
+        with self._mutex:
+            if self._locks.get(key, 0) > time.monotonic():
+                return False
+            self._locks[key] = time.monotonic() + LOCK_TIMEOUT
+            return True
+
+    def _unlock(self, key):
+        with self._mutex:
+            self._locks.pop(key, None)
+
+# One pickle file per key in a directory shared by every worker on the machine, read
+# through a memory map so repeated reads come from the shared page cache. Least
+# recently used files (by mtime, refreshed on reads) are deleted once the directory
+# outgrows max_bytes; a key's lock is a file created exclusively next to it.
+class DiskCache(Cache):
+    # A read refreshes an entry's mtime at most this often (seconds)
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, directory, max_bytes):
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._written = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix='.pkl'):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + suffix)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    value = pickle.loads(data)
+        except (FileNotFoundError, ValueError, EOFError, pickle.UnpicklingError):
+            return MISSING
+        if time.time() - stat.st_mtime > self.TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._written += len(data)
+        if self._written > self.max_bytes / 10:
+            self.evict()
+
+    # Delete the least recently used entries until the directory is within 90% of max_bytes
+    def evict(self):
+        self._written = 0
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= 0.9 * self.max_bytes:
+                break
+
+    def _lock(self, key):
+        path = self._path(key, '.lock')
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            # A lock left behind by a worker that died while computing
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_TIMEOUT:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+            return False
+
+    def _unlock(self, key):
+        try:
+            os.remove(self._path(key, '.lock'))
+        except FileNotFoundError:
+            pass
+
+# Any Redis-compatible server, through a redis-py style client (get, set with
+# nx/px/ex, delete). Size is bounded by the server: run it with maxmemory and
+# maxmemory-policy allkeys-lru; `ttl` additionally expires entries.
+class RedisCache(Cache):
+    def __init__(self, client, prefix='dash-cache:', ttl=None):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self._tokens = {}
+
+    @classmethod
+    def from_url(cls, url, max_bytes=None, **kwargs):
+        if url.startswith('memory://'):
+            return cls(InMemoryRedis(max_bytes), **kwargs)
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        return MISSING if data is None else pickle.loads(data)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=self.ttl)
+
+    def _lock(self, key):
+        token = uuid.uuid4().hex
+        if self.client.set(f'{self.prefix}lock:{key}', token, nx=True, px=int(LOCK_TIMEOUT * 1000)):
+            self._tokens[key] = token
+            return True
+        return False
+
+    # Release only our own lock (it may have expired and been taken by another caller)
+    def _unlock(self, key):
+        lock_key = f'{self.prefix}lock:{key}'
+        token = self._tokens.pop(key, None)
+        current = self.client.get(lock_key)
+        if isinstance(current, bytes):
+            current = current.decode()
+        if token is not None and current == token:
+            self.client.delete(lock_key)
+
+# In-process stand-in for a Redis server: the commands RedisCache uses, key expiry,
+# and allkeys-lru eviction above max_bytes. For tests and single-process runs.
+class InMemoryRedis:
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def _live(self, name):
+        entry = self._data.get(name)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            self._remove(name)
+            return None
+        return entry
+
+    def _remove(self, name):
+        value, _ = self._data.pop(name)
+        self.size -= len(value)
+
+    def get(self, name):
+        with self._mutex:
+            entry = self._live(name)
+            if entry is None:
+                return None
+            self._data.move_to_end(name)
+            return entry[0]
+
+    def set(self, name, value, ex=None, px=None, nx=False):
+        value = value.encode() if isinstance(value, str) else bytes(value)
+        expires = time.monotonic() + ex if ex else time.monotonic() + px / 1000 if px else None
+        with self._mutex:
+            if nx and self._live(name) is not None:
+                return None
+            if name in self._data:
+                self._remove(name)
+            self._data[name] = (value, expires)
+            self.size += len(value)
+            while self.max_bytes and self.size > self.max_bytes and len(self._data) > 1:
+                self._remove(next(iter(self._data)))
+            return True
+
+    def delete(self, *names):
+        with self._mutex:
+            removed = [name for name in names if name in self._data]
+            for name in removed:
+                self._remove(name)
+            return len(removed)
+
+# The backend chosen by CACHE_BACKEND
+def configured_cache():
+    max_bytes = int(CACHE_MAX_MB * 1024 * 1024)
+    if CACHE_BACKEND == 'memory':
+        return MemoryCache(max_bytes)
+    if CACHE_BACKEND == 'disk':
+        return DiskCache(CACHE_DIR, max_bytes)
+    if CACHE_BACKEND == 'redis':
+        return RedisCache.from_url(CACHE_URL, max_bytes)
+    raise ValueError(f"unknown CACHE_BACKEND {CACHE_BACKEND!r}")
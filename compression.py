@@ -0,0 +1,80 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compress responses for clients that accept it (COMPRESS_RESPONSES=0 turns it off)
+ENABLED = os.environ.get('COMPRESS_RESPONSES', '1') == '1'
+
+# Responses smaller than this are sent as they are: the headers would cost more than the saving
+MIN_SIZE = 500
+
+# Fast settings: callback responses are compressed on every request
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'image/svg+xml')
+
+# Compressed Dash/plotly.js bundles, which are the same on every page load and too
+# large to recompress each time. Their URLs are fingerprinted with the package
+# version, so the path alone identifies the content; anything else (the page, the
+# layout, callbacks) is compressed per response.
+BUNDLE_PREFIX = '/_dash-component-suites/'
+BUNDLE_CACHE_SIZE = 64
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Encoding to use for the current request: brotli when available and accepted, then gzip
+def choose_encoding(accept_encoding):
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+        return response
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if encoding is None or len(data) < MIN_SIZE:
+        return response
+
+    if request.method == 'GET' and request.path.startswith(BUNDLE_PREFIX):
+        key = (request.path, encoding)
+        with _cache_lock:
+            compressed = _cache.get(key)
+            if compressed is not None:
+                _cache.move_to_end(key)
+        if compressed is None:
+            compressed = compress(data, encoding)
+            with _cache_lock:
+                _cache[key] = compressed
+                while len(_cache) > BUNDLE_CACHE_SIZE:
+                    _cache.popitem(last=False)
+    else:
+        compressed = compress(data, encoding)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Compress the responses of a Flask server; does nothing when COMPRESS_RESPONSES=0
+def enable_compression(server):
+    if ENABLED:
+        server.after_request(compress_response)
@@ -0,0 +1,144 @@
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+
+# Crests downloaded by fetch_team_crests.py (assets/<Team_Name>_crest.png)
+SOURCE_DIR = 'assets'
+
+# Built crests: content-hashed files and the manifest, served from /assets/crests/
+CREST_DIR = 'assets/crests'
+MANIFEST_FILE = os.path.join(CREST_DIR, 'manifest.json')
+
+# Display height of the crest next to the team dropdown, and of the dropdown icons
+CREST_HEIGHT = 100
+ICON_SIZE = 20
+
+# Sprite cells are drawn at twice the icon size so they stay sharp on high-DPI screens
+SPRITE_SCALE = 2
+
+# Team name from a source crest file name, e.g. assets/Arsenal_FC_crest.png -> Arsenal FC
+def team_from_path(path):
+    return os.path.basename(path)[:-len('_crest.png')].replace('_', ' ')
+
+# Content-hashed file name, e.g. Arsenal_FC.3f2a9c1d7e.webp
+def hashed_name(stem, data, extension):
+    stem = re.sub(r'[^A-Za-z0-9_-]+', '_', stem).strip('_')
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}.{extension}"
+
+# Write bytes under their hashed name (unchanged content keeps its file and URL)
+def write_hashed(stem, data, extension, crest_dir):
+    name = hashed_name(stem, data, extension)
+    path = os.path.join(crest_dir, name)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    return name
+
+# Lossy WebP, or a 256-colour palette PNG (crests are flat artwork, so the palette is near-lossless)
+def encode_image(img, image_format):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    if image_format == 'webp':
+        img.save(buffer, 'WEBP', quality=80, method=6)
+    else:
+        img.quantize(256, method=Image.Quantize.FASTOCTREE).save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+# Write the WebP and PNG encodings of an image; 'src' names the smaller one
+def write_encodings(stem, img, crest_dir):
+    encoded = {image_format: encode_image(img, image_format) for image_format in ('webp', 'png')}
+    names = {image_format: write_hashed(stem, data, image_format, crest_dir) for image_format, data in encoded.items()}
+    names['src'] = names[min(encoded, key=lambda image_format: len(encoded[image_format]))]
+    return names
+
+# Downsize every source crest to CREST_HEIGHT, write WebP and optimized PNG copies
+# under content-hashed names plus one sprite sheet of dropdown icons, and record
+# them in the manifest. Hashed names change whenever the content does, so the
+# files can be cached by browsers indefinitely.
+def build_crests(source_dir=SOURCE_DIR, crest_dir=CREST_DIR):
+    from PIL import Image
+
+    os.makedirs(crest_dir, exist_ok=True)
+    sources = sorted(glob.glob(os.path.join(source_dir, '*_crest.png')))
+    cell = ICON_SIZE * SPRITE_SCALE
+    sprite = Image.new('RGBA', (cell * len(sources), cell), (0, 0, 0, 0))
+
+    teams = {}
+    for index, path in enumerate(sources):
+        team = team_from_path(path)
+        img = Image.open(path).convert('RGBA')
+        img.thumbnail((img.width * CREST_HEIGHT // img.height, CREST_HEIGHT), Image.LANCZOS)
+        stem = os.path.basename(path)[:-len('_crest.png')]
+        teams[team] = {
+            **write_encodings(stem, img, crest_dir),
+            'width': img.width,
+            'height': img.height,
+            'sprite_index': index,
+        }
+
+        icon = img.copy()
+        icon.thumbnail((cell, cell), Image.LANCZOS)
+        sprite.paste(icon, (index * cell + (cell - icon.width) // 2, (cell - icon.height) // 2), icon)
+
+    manifest = {
+        'teams': teams,
+        'sprite': {
+            **write_encodings('crest_sprite', sprite, crest_dir),
+            'icon_size': ICON_SIZE,
+            'count': len(sources),
+        },
+    }
+    tmp_path = os.path.join(crest_dir, 'manifest.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, os.path.join(crest_dir, 'manifest.json'))
+
+    # Drop hashed files no longer referenced by the manifest
+    current = {entry[key] for entry in [*teams.values(), manifest['sprite']] for key in ('webp', 'png')}
+    for name in os.listdir(crest_dir):
+        if name != 'manifest.json' and name not in current:
+            os.remove(os.path.join(crest_dir, name))
+    return manifest
+
+_manifest_cache = {}
+
+# Manifest contents, re-read only when the file changes; empty if the crests have not been built
+def load_manifest(path=MANIFEST_FILE):
+    try:
+        version = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {'teams': {}}
+    cached = _manifest_cache.get(path)
+    if cached is None or cached[0] != version:
+        with open(path) as f:
+            cached = _manifest_cache[path] = (version, json.load(f))
+    return cached[1]
+
+# Path of a team's built crest relative to the assets folder, or None if it has not been built.
+# image_format 'src' is whichever of WebP and PNG came out smaller.
+def crest_asset(team, image_format='src', path=MANIFEST_FILE):
+    entry = load_manifest(path)['teams'].get(team)
+    if entry is None:
+        return None
+    return 'crests/' + entry[image_format]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build content-hashed, downsized crests and their manifest")
+    parser.add_argument('--source-dir', default=SOURCE_DIR)
+    parser.add_argument('--crest-dir', default=CREST_DIR)
+    args = parser.parse_args()
+
+    source_bytes = sum(os.path.getsize(path) for path in glob.glob(os.path.join(args.source_dir, '*_crest.png')))
+    manifest = build_crests(args.source_dir, args.crest_dir)
+    webp_bytes = sum(os.path.getsize(os.path.join(args.crest_dir, entry['webp'])) for entry in manifest['teams'].values())
+    png_bytes = sum(os.path.getsize(os.path.join(args.crest_dir, entry['png'])) for entry in manifest['teams'].values())
+    src_bytes = sum(os.path.getsize(os.path.join(args.crest_dir, entry['src'])) for entry in manifest['teams'].values())
+    sprite_bytes = os.path.getsize(os.path.join(args.crest_dir, manifest['sprite']['src']))
+    print(f"Built {len(manifest['teams'])} crests: source {source_bytes / 1024:.1f} KB, "
+          f"WebP {webp_bytes / 1024:.1f} KB, PNG {png_bytes / 1024:.1f} KB, served {src_bytes / 1024:.1f} KB, "
+          f"sprite {sprite_bytes / 1024:.1f} KB")
@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+import time
+
+from aggregates import build_aggregates, load_aggregates, team_frames
+from cache import MemoryCache, cache_key, configured_cache
+from instrumentation import phase
+from pair_index import PairIndex
+from storage import STORE_DIR, list_partitions, partition_path, read_data_file
+
+# Path to the standings data produced by process_data.py
+STANDINGS_FILE = 'data/standings_per_week.csv'
+
+# Seconds between checks of the standings file for a new version
+RELOAD_INTERVAL = float(os.environ.get('DATA_RELOAD_INTERVAL', 60))
+
+logger = logging.getLogger(__name__)
+
+# Files of a store partition loaded along with its standings: the team-pair index and
+# the startup snapshot of the aggregates (process_data.py) and the season-outcome
+# probabilities (simulation.py)
+PAIRS_FILE = 'pairs.npz'
+AGGREGATES_FILE = 'aggregates.npz'
+PROBABILITIES_FILE = 'probabilities.arrow'
+
+# Start from a partition's startup snapshot when it matches the standings file
+# (STARTUP_SNAPSHOT=0 always reads and aggregates the standings instead)
+STARTUP_SNAPSHOT = os.environ.get('STARTUP_SNAPSHOT', '1') == '1'
+
+# Figures, clientside payloads and aggregates of every snapshot, keyed on (standings
+# file, snapshot version, team, chart); with CACHE_BACKEND=disk or redis, workers
+# share what any of them has built (cache.py)
+cache = configured_cache()
+
+# Version stamp of a data file: changes whenever the file is rewritten
+def data_version(path=STANDINGS_FILE):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+# Version stamp of a standings file together with the partition files next to it
+def snapshot_version(path=STANDINGS_FILE):
+    sidecars = [os.path.join(os.path.dirname(path), name) for name in (PAIRS_FILE, AGGREGATES_FILE, PROBABILITIES_FILE)]
+    return (data_version(path),) + tuple(data_version(sidecar) if os.path.exists(sidecar) else None for sidecar in sidecars)
+
+# One version of the standings file with everything derived from it: the team
+# aggregates (aggregates.py), the partition's team-pair index when there is one and,
+# built on first use, the team index, the league band traces, each (team, chart)
+# figure, the clientside payload and the season-outcome probabilities. Figures, the
+# payload and aggregates built from the table live in the shared cache under the
+# snapshot's dataset (its standings file) and version; a snapshot without a dataset
+# keeps them to itself. A snapshot starts from numpy arrays alone; pandas and plotly
+# (figures.py) are imported by the first callback that needs them. A snapshot is
+# never modified after it is published, so a callback keeps a consistent view even
+# if a reload happens while it runs; only the probabilities are read on first use,
+# and a newer probabilities file is picked up by the next reload.
+class Snapshot:
+    def __init__(self, standings_df, version, pair_index=None, probabilities_path=None, aggregates=None,
+                 dataset=None):
+        self.version = version
+        self.dataset = dataset
+        self._cache = cache if dataset is not None else MemoryCache(float('inf'))
+        self.standings_df = standings_df
+        self.aggregates = aggregates if aggregates is not None \
+            else self.cached(None, 'aggregates', lambda: build_aggregates(standings_df))
+        self.pair_index = pair_index
+        self.probabilities_path = probabilities_path
+        self.teams = [str(team) for team in self.aggregates['teams']]
+        self._team_index = None
+        self._traces = None
+        self._probabilities_df = None
+
+    # Per-team standings frames, sorted by team name
+    @property
+    def team_index(self):
+        if self._team_index is None:
+            self._team_index = team_frames(self.aggregates)
+        return self._team_index
+
+    @property
+    def traces(self):
+        if self._traces is None:
+            from figures import league_traces
+            self._traces = league_traces(self.aggregates)
+        return self._traces
+
+    @property
+    def probabilities_df(self):
+        if self._probabilities_df is None and self.probabilities_path is not None:
+            self._probabilities_df = read_data_file(self.probabilities_path)
+        return self._probabilities_df
+
+    # The cached value for (team, chart) of this snapshot, built by build() on a miss
+    def cached(self, team, chart, build):
+        return self._cache.get_or_compute(cache_key(self.dataset, self.version, team, chart), build)
+
+    # Serialized figure for one (team, chart) pair, built once per snapshot
+    def figure(self, team, chart):
+        def build():
+            from figures import build_figure, slim_figure
+            with phase('figure'):
+                return slim_figure(build_figure(team, chart, self.team_index[team], self.traces,
+                                                len(self.teams)).to_plotly_json())
+        return self.cached(team, chart, build)
+
+    # Serialized probability chart for one team, or None without simulation results
+    def probability_figure(self, team):
+        if self.probabilities_path is None:
+            return None
+        def build():
+            from figures import build_probability_figure, slim_figure
+            team_probabilities = self.probabilities_df[self.probabilities_df['Team'] == team]
+            with phase('figure'):
+                return slim_figure(build_probability_figure(team, team_probabilities).to_plotly_json())
+        return self.cached(team, 'probabilities', build)
+
+    def client_payload(self):
+        def build():
+            from figures import client_payload
+            return client_payload(self.aggregates)
+        return self.cached(None, 'client_payload', build)
+
+    # Build everything a callback could need: every figure and the clientside payload
+    def warm(self):
+        from figures import CHARTS
+        for team in self.teams:
+            for chart in CHARTS:
+                self.figure(team, chart)
+            self.probability_figure(team)
+        self.client_payload()
+
+# Read a standings file (CSV or Arrow) into a snapshot, with the pair index next to
+# it if present; a read that overlaps a write is retried. The startup snapshot next
+# to it, when it was built from the same standings, replaces reading and aggregating
+# the table.
+def load_snapshot(path=STANDINGS_FILE, attempts=3):
+    pairs_path = os.path.join(os.path.dirname(path), PAIRS_FILE)
+    aggregates_path = os.path.join(os.path.dirname(path), AGGREGATES_FILE)
+    probabilities_path = os.path.join(os.path.dirname(path), PROBABILITIES_FILE)
+    for _ in range(attempts):
+        version = snapshot_version(path)
+        aggregates = load_aggregates(aggregates_path, path) \
+            if STARTUP_SNAPSHOT and os.path.exists(aggregates_path) else None
+        standings_df = read_data_file(path) if aggregates is None else None
+        pair_index = PairIndex.load(pairs_path) if os.path.exists(pairs_path) else None
+        if snapshot_version(path) == version:
+            return Snapshot(standings_df, version, pair_index,
+                            probabilities_path if os.path.exists(probabilities_path) else None, aggregates, path)
+    raise RuntimeError(f"{path} kept changing while it was being read")
+
+# Serves the current snapshot and swaps in a new one when the file changes.
+# At most once per interval, a request starts a background check; the check and
+# any rebuild run off the request path, and the new snapshot replaces the old one
+# with a single reference assignment. Callbacks never wait on a reload, and only
+# one reload runs per process at a time.
+class DataProvider:
+    def __init__(self, path=STANDINGS_FILE, interval=RELOAD_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._snapshot = load_snapshot(path)
+        self._next_check = time.monotonic() + interval
+        self._reloading = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if now >= self._next_check and self._reloading.acquire(blocking=False):
+            self._next_check = now + self.interval
+            threading.Thread(target=self._reload, daemon=True).start()
+        return self._snapshot
+
+    def _reload(self):
+        try:
+            if snapshot_version(self.path) != self._snapshot.version:
+                self._snapshot = load_snapshot(self.path)
+                logger.info("Reloaded %s (version %s)", self.path, self._snapshot.version)
+        except Exception:
+            logger.exception("Reloading %s failed; keeping the current data", self.path)
+        finally:
+            self._reloading.release()
+
+# One DataProvider per (competition, season) partition of the columnar store,
+# created when a partition is first requested. get() returns None for a partition
+# that is not in the store, and keeps nothing for it.
+class PartitionProviders:
+    def __init__(self, store_dir=STORE_DIR, interval=RELOAD_INTERVAL):
+        self.store_dir = store_dir
+        self.interval = interval
+        self._providers = {}
+
+    def get(self, competition, season):
+        key = (competition, season)
+        provider = self._providers.get(key)
+        if provider is None:
+            path = partition_path(competition, season, 'standings', self.store_dir)
+            if not os.path.exists(path):
+                return None
+            provider = self._providers.setdefault(key, DataProvider(path, self.interval))
+        return provider.get()
+
+    # Load and warm every partition in the store; returns their keys
+    def preload(self):
+        partitions = list_partitions(store_dir=self.store_dir)
+        for competition, season in partitions:
+            self.get(competition, season).warm()
+        return partitions
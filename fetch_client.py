@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Base URL for the Football-Data.org API
+BASE_URL = 'https://api.football-data.org/v4/'
+
+# Free tier quota of the Football-Data.org API
+REQUESTS_PER_MINUTE = 10
+
+# Conditional-request cache: one metadata file and one body file per URL
+CACHE_DIR = 'data/http_cache'
+
+logger = logging.getLogger(__name__)
+
+# Thread-safe token bucket: `rate` tokens per `per` seconds, bursting up to `capacity`
+class TokenBucket:
+    def __init__(self, rate, per=60.0, capacity=None):
+        self.rate = rate / per
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Block until a token is available, then take it
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    # Empty the bucket, e.g. after the server reports the quota is used up
+    def drain(self):
+        with self._lock:
+            self._tokens = 0
+            self._updated = time.monotonic()
+
+# HTTP client for the Football-Data.org API and crest downloads. One pooled
+# session is shared by up to `max_workers` threads, API calls draw from a token
+# bucket sized to the per-minute quota, 429 and 5xx responses are retried with
+# backoff (honouring Retry-After), and responses are cached on disk with their
+# ETag/Last-Modified so an unchanged resource costs a 304. Point `base_url` at a
+# local stub server to exercise it without the network.
+class FetchClient:
+    def __init__(self, api_key=None, base_url=BASE_URL, requests_per_minute=REQUESTS_PER_MINUTE,
+                 max_workers=4, cache_dir=CACHE_DIR, timeout=30, max_retries=5, backoff=2.0):
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(requests_per_minute)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.api_key = api_key
+
+    def _cache_paths(self, url, params):
+        key = hashlib.sha256(json.dumps([url, sorted((params or {}).items())]).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key + '.json'), os.path.join(self.cache_dir, key + '.body')
+
+    # Seconds to wait before retrying a throttled or failed response
+    def _retry_delay(self, response, attempt):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+        return self.backoff * 2 ** attempt
+
+    # GET with retries and the conditional-request cache; returns the body bytes
+    def get(self, url, params=None, rate_limited=True):
+        if not url.startswith(('http://', 'https://')):
+            url = self.base_url + url
+        meta_path, body_path = self._cache_paths(url, params) if self.cache_dir else (None, None)
+        meta = {}
+        if self.cache_dir and os.path.exists(meta_path) and os.path.exists(body_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+
+        # The API token is only sent to the API, not to crest or other hosts
+        headers = {'X-Auth-Token': self.api_key} if self.api_key and url.startswith(self.base_url) else {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        for attempt in range(self.max_retries + 1):
+            if rate_limited:
+                self.bucket.acquire()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("GET %s failed (%s); retrying", url, error)
+                time.sleep(self._retry_delay(None, attempt))
+                continue
+
+            if response.status_code == 304:
+                with open(body_path, 'rb') as f:
+                    return f.read()
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                if response.status_code == 429:
+                    self.bucket.drain()
+                delay = self._retry_delay(response, attempt)
+                logger.warning("GET %s returned %s; retrying in %.1fs", url, response.status_code, delay)
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            if self.cache_dir and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+                self._store(meta_path, body_path, response)
+            return response.content
+
+    def _store(self, meta_path, body_path, response):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(body_path + '.tmp', 'wb') as f:
+            f.write(response.content)
+        os.replace(body_path + '.tmp', body_path)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({'url': response.url, 'etag': response.headers.get('ETag'),
+                       'last_modified': response.headers.get('Last-Modified')}, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def get_json(self, url, params=None):
+        return json.loads(self.get(url, params))
+
+    # Run func over items on the client's thread pool, returning results in order
+    def map(self, func, items):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, items))
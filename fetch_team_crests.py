@@ -1,13 +1,15 @@
-import requests
 import os
 import pandas as pd
+import requests
 from PIL import Image
 from io import BytesIO
 
+from crests import build_crests
+from fetch_client import FetchClient
+
 # Replace with your actual API key
 api_key = '6873646605dd4457af95fabe8a0d261b'
-api_url = 'https://api.football-data.org/v4/competitions/PL/teams?season=2023'
-headers = {'X-Auth-Token': api_key}
+client = FetchClient(api_key)
 
 # Path to standings data file (from process_data step)
 data_file = 'data/standings_per_week.csv'
@@ -23,33 +25,38 @@ standings_df = pd.read_csv(data_file)
 teams_in_data = standings_df['Team'].unique()  # Extract unique teams from your data file
 
 # Fetch team data from the football-data.org API (2023/24 season)
-response = requests.get(api_url, headers=headers)
-data = response.json()
+data = client.get_json('competitions/PL/teams', params={'season': 2023})
 
 # Create a dictionary for team crests (team name to crest URL)
 team_crests = {team['name']: team['crest'] for team in data['teams']}
 
-# Loop through each team in your standings data and download the crest
-for team_name in teams_in_data:
-    if team_name in team_crests:
-        crest_url = team_crests[team_name]
-        
-        print(f"Downloading crest for {team_name}...")
-        
-        # Download the crest image
-        img_response = requests.get(crest_url)
-        
-        # Check if the request was successful
-        if img_response.status_code == 200:
-            img = Image.open(BytesIO(img_response.content))
-            
-            # Save the image to the data/crests/ directory
-            image_path = os.path.join(crest_dir, f"{team_name.replace(' ', '_')}_crest.png")
-            img.save(image_path)
-            print(f"Crest saved: {image_path}")
-        else:
-            print(f"Failed to download crest for {team_name}")
-    else:
+# Download and save one team's crest
+def download_crest(team_name):
+    if team_name not in team_crests:
         print(f"No crest found for {team_name} in the API data.")
+        return
+
+    print(f"Downloading crest for {team_name}...")
+
+    # Download the crest image (crest CDN requests do not count against the API quota)
+    try:
+        content = client.get(team_crests[team_name], rate_limited=False)
+    except requests.RequestException:
+        print(f"Failed to download crest for {team_name}")
+        return
+
+    img = Image.open(BytesIO(content))
+
+    # Save the image to the assets directory
+    image_path = os.path.join(crest_dir, f"{team_name.replace(' ', '_')}_crest.png")
+    img.save(image_path)
+    print(f"Crest saved: {image_path}")
+
+# Download the crests for every team in your standings data concurrently
+client.map(download_crest, teams_in_data)
 
 print("All relevant crests downloaded.")
+
+# Downsize the crests into content-hashed files and update the manifest the app serves from
+build_crests(crest_dir)
+print("Crest manifest updated.")
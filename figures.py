@@ -0,0 +1,180 @@
+import base64
+import functools
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from dash_bootstrap_templates import load_figure_template
+
+# Load a Bootstrap template. This module is imported on first use (data_provider.py),
+# so plotly and the templates load when the first figure is built, not at app start.
+load_figure_template('simplex')
+
+# Define color scheme
+team_color = 'navy' # Main team color
+average_color = 'crimson' # Average line color
+std_dev_color = 'rgba(192, 192, 192, 0.3)'  # Standard deviation fill color (gray with transparency)
+live_color = 'darkorange'  # Provisional live position marker
+
+# Per-chart settings: standings column, league band ('mean' = average ± 1 S.D.,
+# 'zero' = 0 ± 1 S.D., None = no band), trace name and axis/title text
+CHARTS = {
+    'points': dict(column='Points', band='mean', name='Points',
+                   title='Cumulative Points', yaxis_title='Points'),
+    'goals_scored': dict(column='Goals_For', band='mean', name='Goals For',
+                         title='Cumulative Goals Scored', yaxis_title='Goals Scored'),
+    'goals_conceded': dict(column='Goals_Against', band='mean', name='Goals Against',
+                           title='Cumulative Goals Conceded', yaxis_title='Goals Conceded'),
+    'goal_diff': dict(column='Goal_Diff', band='zero', name='Goal Difference',
+                      title='Cumulative Goal Difference', yaxis_title='Goal Difference'),
+    'position': dict(column='Position', band=None, name=None,
+                     title='League Position per Game Week', yaxis_title='League Position'),
+}
+
+# League-wide traces (average line and ± 1 S.D. polygon) for every chart, from the
+# weekly league averages and deviations of a startup snapshot (aggregates.py)
+def league_traces(aggregates):
+    weeks = aggregates['weeks']
+    traces = {}
+    for chart, spec in CHARTS.items():
+        if spec['band'] is None:
+            traces[chart] = []
+            continue
+        std_dev = aggregates[f"std_{spec['column']}"]
+        center = aggregates[f"mean_{spec['column']}"] if spec['band'] == 'mean' else np.zeros(len(weeks))
+        band = go.Scatter(
+            x=np.concatenate([weeks, weeks[::-1]]).tolist(),
+            y=np.concatenate([center + std_dev, (center - std_dev)[::-1]]).tolist(),
+            fill='toself',
+            fillcolor=std_dev_color,
+            line=dict(color='rgba(255,255,255,0)'),
+            name="± 1 S.D.",
+            showlegend=True
+        )
+        if spec['band'] == 'mean':
+            average = go.Scatter(x=weeks, y=center, mode='lines', name='Average', line=dict(color=average_color))
+            traces[chart] = [average, band]
+        else:
+            traces[chart] = [band]
+    return traces
+
+# Build the figure for one team and chart from the team's rows and the league traces
+def build_figure(team, chart, team_data, traces, n_teams=20):
+    spec = CHARTS[chart]
+    fig = go.Figure(data=traces[chart])
+    fig.add_trace(go.Scatter(x=team_data['Game_Week'], y=team_data[spec['column']], mode='lines+markers',
+                             name=spec['name'], line=dict(color=team_color)))
+    if chart == 'goal_diff':
+        # Add a horizontal line at zero
+        fig.add_hline(y=0, line_dash="dot")
+    fig.update_layout(title=f"{team} - {spec['title']}", xaxis_title='Game Week', yaxis_title=spec['yaxis_title'])
+    if chart == 'position':
+        fig.update_layout(yaxis=dict(range=[n_teams + 0.5, 0.5],  # Adjusted to give headroom above 1
+                                     autorange=False,
+                                     nticks=n_teams,
+                                     tickmode='linear'))  # Fixed y-axis range from 1 to the number of teams
+    return fig
+
+# Season-outcome probabilities from simulation.py: (column, trace name, color)
+PROBABILITY_TRACES = [('Title', 'Title', 'gold'), ('Top_4', 'Top 4', team_color), ('Relegation', 'Relegation', average_color)]
+
+# Title, top-four and relegation probability per game week for one team
+def build_probability_figure(team, team_probabilities):
+    fig = go.Figure()
+    for column, name, color in PROBABILITY_TRACES:
+        fig.add_trace(go.Scatter(x=team_probabilities['Game_Week'], y=team_probabilities[column] * 100,
+                                 mode='lines+markers', name=name, line=dict(color=color)))
+    fig.update_layout(title=f"{team} - Season Outcome Probabilities", xaxis_title='Game Week',
+                      yaxis_title='Probability (%)', yaxis=dict(range=[-2, 102]))
+    return fig
+
+# A serialized position chart with the team's provisional position from the live table (live.py)
+def with_live_position(figure, week, position):
+    marker = {'type': 'scatter', 'x': [week], 'y': [position], 'mode': 'markers', 'name': 'Live (provisional)',
+              'marker': {'color': live_color, 'size': 14, 'symbol': 'star'}}
+    return {'data': figure['data'] + [marker], 'layout': figure['layout']}
+
+# Strip figures down before they are sent (SLIM_FIGURES=0 sends plotly's full output)
+SLIM_FIGURES = os.environ.get('SLIM_FIGURES', '1') == '1'
+
+# Plotly.js (2.28+) typed-array codes for the numpy dtypes figures are encoded with
+PLOTLY_DTYPES = {'int8': 'i1', 'int16': 'i2', 'int32': 'i4', 'float32': 'f4', 'float64': 'f8'}
+
+# Numeric x/y data as a plotly.js typed array: whole numbers in the smallest integer
+# type, anything else as float32 (more precision than a chart or hover label shows)
+def plotly_array(values):
+    values = np.asarray(values)
+    if values.dtype.kind not in 'iuf' or values.size == 0:
+        return values
+    if values.dtype.kind == 'f' and not (np.isfinite(values).all() and (values == np.round(values)).all()):
+        encoded = encode_array(values, 'float32')
+    else:
+        encoded = encode_array(values.astype(np.int64))
+    return {'dtype': PLOTLY_DTYPES[encoded['dtype']], 'bdata': encoded['bdata']}
+
+# Template layout settings for colour scales and non-cartesian subplots, which line charts never use
+UNUSED_TEMPLATE_LAYOUT = ['colorscale', 'coloraxis', 'scene', 'ternary', 'polar', 'geo', 'mapbox', 'piecolorway']
+
+# The active template reduced to the trace types in `trace_types` and the layout line
+# charts use: the full template carries defaults for every plotly trace type and
+# subplot (about 8 KB per figure)
+@functools.lru_cache(maxsize=None)
+def _slim_template(template_name, trace_types):
+    template = pio.templates[template_name].to_plotly_json()
+    template['data'] = {trace_type: template['data'][trace_type] for trace_type in trace_types
+                        if trace_type in template.get('data', {})}
+    template['layout'] = {key: value for key, value in template.get('layout', {}).items()
+                          if key not in UNUSED_TEMPLATE_LAYOUT}
+    return template
+
+def slim_template(trace_types=('scatter',)):
+    return _slim_template(pio.templates.default, tuple(trace_types))
+
+# Figure dict ready to send: the slim template and binary-encoded x/y arrays
+def slim_figure(figure):
+    if not SLIM_FIGURES:
+        return figure
+    trace_types = sorted({trace.get('type', 'scatter') for trace in figure['data']})
+    return {
+        'data': [{key: plotly_array(value) if key in ('x', 'y') else value for key, value in trace.items()}
+                 for trace in figure['data']],
+        'layout': dict(figure['layout'], template=slim_template(tuple(trace_types))),
+    }
+
+# Standings columns shipped to the browser in clientside rendering mode
+CLIENT_COLUMNS = ['Game_Week', 'Position', 'Points', 'Wins', 'Draws', 'Losses', 'Goals_For', 'Goals_Against', 'Goal_Diff']
+
+# Little-endian typed array: base64 bytes plus the dtype name the browser decodes them with.
+# Integer columns use the smallest signed type that holds their range.
+def encode_array(values, dtype=None):
+    values = np.asarray(values)
+    if dtype is None:
+        low, high = (int(values.min()), int(values.max())) if values.size else (0, 0)
+        dtype = next(t for t in (np.int8, np.int16, np.int32, np.int64)
+                     if np.iinfo(t).min <= low and high <= np.iinfo(t).max)
+    values = values.astype(np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': values.dtype.name, 'bdata': base64.b64encode(values.tobytes()).decode('ascii')}
+
+# Whole season as one compact columnar payload for a dcc.Store: rows sorted by team
+# then week, per-team row offsets, league bands and the chart settings, so the
+# browser can draw every chart and the summary without calling back to the server
+def client_payload(aggregates):
+    bands = {}
+    for chart, spec in CHARTS.items():
+        if spec['band'] is not None:
+            bands[chart] = {
+                'mean': encode_array(aggregates[f"mean_{spec['column']}"], 'float64'),
+                'std': encode_array(aggregates[f"std_{spec['column']}"], 'float64'),
+            }
+
+    return {
+        'teams': [str(team) for team in aggregates['teams']],
+        'offsets': encode_array(aggregates['team_offsets'], 'int32'),
+        'columns': {column: encode_array(aggregates[f'column_{column}']) for column in CLIENT_COLUMNS},
+        'weeks': encode_array(aggregates['weeks']),
+        'bands': bands,
+        'charts': CHARTS,
+        'colors': {'team': team_color, 'average': average_color, 'std_dev': std_dev_color},
+        'template': slim_template() if SLIM_FIGURES else pio.templates[pio.templates.default].to_plotly_json(),
+    }
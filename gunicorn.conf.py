@@ -0,0 +1,33 @@
+import gc
+import os
+import time
+
+# Gunicorn settings, read from the working directory by `gunicorn app:server` (Procfile).
+# Worker count comes from gunicorn's own WEB_CONCURRENCY / --workers.
+
+# GUNICORN_PRELOAD=1: import the app and load every store partition once in the master,
+# then fork workers that share those pages instead of each importing and loading its own
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0') == '1'
+
+# A collection in a worker writes to the header of every object it scans, which copies
+# the master's pages into the worker; the master collects nothing before forking and
+# freezes what it has loaded, so workers only ever scan their own objects; the
+# master turns collection back on once it has frozen its heap, before any fork
+if preload_app:
+    gc.disable()
+
+def when_ready(server):
+    if preload_app:
+        import app
+        start = time.perf_counter()
+        partitions = app.warm_start()
+        gc.freeze()
+        gc.enable()
+        server.log.info("Preloaded %d partitions in %.2fs", len(partitions), time.perf_counter() - start)
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+# Worker cold start: fork to ready to serve, including the app import unless it was preloaded
+def post_worker_init(worker):
+    worker.log.info("Worker %s ready in %.3fs", worker.pid, time.perf_counter() - worker.forked_at)
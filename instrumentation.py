@@ -0,0 +1,143 @@
+import cProfile
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import nullcontext
+
+# Opt-in callback instrumentation (DASH_INSTRUMENTATION=1). Each callback request is
+# split into compute (the callback minus figure work), figure construction (figure
+# building and conversion to plain dicts, timed with `phase('figure')`) and
+# serialization (the rest of the request: Dash encoding the response to JSON and
+# its dispatch overhead), plus the response size. Totals go to Prometheus
+# histograms served on /metrics. When disabled nothing is wrapped or registered
+# and `phase` returns a shared no-op context manager.
+ENABLED = os.environ.get('DASH_INSTRUMENTATION', '0') == '1'
+
+# Fraction of callback requests run under cProfile, with the stats written to PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'data/profiles')
+
+UPDATE_PATH = '/_dash-update-component'
+
+# Histogram buckets: seconds for the phases, bytes for the response payloads
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PAYLOAD_BUCKETS = (1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+
+logger = logging.getLogger(__name__)
+
+_NO_PHASE = nullcontext()
+_current = threading.local()
+_metrics = None
+
+# Time the enclosed block as part of the current callback's `name` phase
+def phase(name):
+    if not ENABLED or getattr(_current, 'record', None) is None:
+        return _NO_PHASE
+    return _Phase(_current.record, name)
+
+class _Phase:
+    def __init__(self, record, name):
+        self.record = record
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.record[self.name] = self.record.get(self.name, 0.0) + time.perf_counter() - self.start
+
+# Prometheus collectors, created on first use. Under gunicorn, set PROMETHEUS_MULTIPROC_DIR
+# so /metrics aggregates every worker rather than the one that answers the scrape.
+def metrics():
+    global _metrics
+    if _metrics is None:
+        from prometheus_client import Histogram
+        _metrics = {
+            'duration': Histogram('dash_callback_duration_seconds', 'Callback request time by phase',
+                                  ['callback', 'phase'], buckets=DURATION_BUCKETS),
+            'payload': Histogram('dash_callback_payload_bytes', 'Callback response size',
+                                 ['callback'], buckets=PAYLOAD_BUCKETS),
+        }
+    return _metrics
+
+def metrics_response():
+    from flask import Response
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+# Wrap a callback so its run time lands in the request's record, sometimes under cProfile
+def timed_callback(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        record = getattr(_current, 'record', None)
+        if record is None:
+            return func(*args, **kwargs)
+        record['callback_name'] = func.__name__
+        profiler = cProfile.Profile() if random.random() < PROFILE_SAMPLE_RATE else None
+        start = time.perf_counter()
+        try:
+            if profiler is None:
+                return func(*args, **kwargs)
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            record['callback'] = time.perf_counter() - start
+            if profiler is not None:
+                record['profile'] = profiler
+    return wrapper
+
+def _start_request():
+    from flask import request
+    if request.path == UPDATE_PATH:
+        _current.record = {'start': time.perf_counter()}
+
+def _finish_request(response):
+    record = getattr(_current, 'record', None)
+    _current.record = None
+    if record is None or 'callback' not in record:
+        return response
+
+    total = time.perf_counter() - record['start']
+    figure = record.get('figure', 0.0)
+    phases = {'compute': record['callback'] - figure, 'figure': figure,
+              'serialization': total - record['callback'], 'total': total}
+    name = record['callback_name']
+    collectors = metrics()
+    for phase_name, seconds in phases.items():
+        collectors['duration'].labels(name, phase_name).observe(seconds)
+    payload_bytes = response.calculate_content_length() or 0
+    collectors['payload'].labels(name).observe(payload_bytes)
+
+    if 'profile' in record:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f'{name}-{time.time_ns()}.prof')
+        record['profile'].dump_stats(path)
+        logger.info("%s: %s, %d bytes, profile %s", name,
+                    ', '.join(f'{key} {value * 1e3:.1f} ms' for key, value in phases.items()), payload_bytes, path)
+    return response
+
+# Instrument a Dash app: every callback registered after this call is timed, and
+# /metrics serves the histograms. Does nothing unless DASH_INSTRUMENTATION=1.
+def instrument(app):
+    if not ENABLED:
+        return
+    register = app.callback
+
+    @functools.wraps(register)
+    def callback(*args, **kwargs):
+        decorator = register(*args, **kwargs)
+        return lambda func: decorator(timed_callback(func))
+
+    app.callback = callback
+    app.server.before_request(_start_request)
+    app.server.after_request(_finish_request)
+    app.server.add_url_rule('/metrics', 'metrics', metrics_response)
+    metrics()
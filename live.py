@@ -0,0 +1,372 @@
+import argparse
+import asyncio
+import bisect
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+from storage import STORE_DIR, partition_path
+
+# Live standings during matchdays. An asyncio ingester reads match-state changes
+# from a source (the API, polled; or a replay file or socket feed for tests),
+# applies each one as a delta to an in-memory table and publishes the provisional
+# table as live.json in the partition's store directory. The app reads that file
+# (LiveTables), at most once per interval per process, however many clients watch.
+#
+#   python live.py --competition PL --season 2024 --source api --competition-id 2021
+#   python live.py --competition PL --season 2023 --source replay:events.jsonl --speed 60
+#   python live.py --competition PL --season 2023 --source socket:127.0.0.1:9000
+
+# Match states whose score counts towards the provisional table
+LIVE_STATUSES = {'IN_PLAY', 'PAUSED', 'FINISHED'}
+
+TALLY_COLUMNS = ['Points', 'Wins', 'Draws', 'Losses', 'Goals_For', 'Goals_Against']
+
+# Seconds between API polls (the free tier allows 10 requests a minute)
+POLL_INTERVAL = float(os.environ.get('LIVE_POLL_INTERVAL', 10))
+
+# Seconds between checks of live.json by the app
+CHECK_INTERVAL = float(os.environ.get('LIVE_CHECK_INTERVAL', 1))
+
+# Seconds after its last write that the app stops showing a live table, so one left
+# behind by an earlier matchday expires even if the stored standings never move on
+MAX_AGE = float(os.environ.get('LIVE_MAX_AGE', 6 * 3600))
+
+logger = logging.getLogger(__name__)
+
+# A score is missing as None (JSON) or NaN (pandas)
+def has_score(value):
+    return value is not None and value == value
+
+def live_path(competition, season, store_dir=STORE_DIR):
+    return partition_path(competition, season, 'live', store_dir, extension='json')
+
+# Standings kept up to date one match-state change at a time. Teams are held in
+# table order as (sort key, team) pairs; a change to a match moves only its two
+# teams, each by one removal and one binary-search insertion, and only the
+# positions between a team's old and new place are renumbered. The sort key
+# matches process_data.py: points, goal difference, goals for, then the order in
+# which teams first appear in the fixture list.
+class LiveStandings:
+    def __init__(self, teams, fixture_weeks=None):
+        self.tie_order = {team: i for i, team in enumerate(teams)}
+        self.tallies = {team: dict.fromkeys(TALLY_COLUMNS, 0) for team in teams}
+        self.weeks = dict.fromkeys(teams, 0)
+        self.fixture_weeks = fixture_weeks or {}
+        self.matches = {}
+        self.match_weeks = {}
+        self.order = sorted((self._key(team), team) for team in teams)
+        self.positions = {team: i + 1 for i, (_, team) in enumerate(self.order)}
+        self.base_positions = dict(self.positions)
+        self.version = 0
+
+    # Table from a store partition's matches: every finished match counts, and the
+    # starting positions are those of the stored standings' last week
+    @classmethod
+    def from_store(cls, competition, season, store_dir=STORE_DIR):
+        from process_data import finished_matches, team_order
+        from storage import read_partition
+
+        matches_df = read_partition(competition, season, 'matches', store_dir)
+        fixture_weeks = {}
+        for match in matches_df.to_dict('records'):
+            fixture_weeks[int(match['Match_ID'])] = (int(match.get('Home_Game_Week', match['Game_Week'])),
+                                                     int(match.get('Away_Game_Week', match['Game_Week'])))
+        standings = cls([str(team) for team in team_order(matches_df)], fixture_weeks)
+        finished = finished_matches(matches_df).dropna(subset=['Home_Score', 'Away_Score'])
+        for match in finished.to_dict('records'):
+            standings.apply(match)
+        standings.base_positions = dict(standings.positions)
+        standings.version = 0
+        return standings
+
+    def _key(self, team):
+        tally = self.tallies[team]
+        goal_diff = tally['Goals_For'] - tally['Goals_Against']
+        return (-tally['Points'], -goal_diff, -tally['Goals_For'], self.tie_order[team])
+
+    def _add_team(self, team):
+        self.tie_order[team] = len(self.tie_order)
+        self.tallies[team] = dict.fromkeys(TALLY_COLUMNS, 0)
+        self.weeks[team] = 0
+        entry = (self._key(team), team)
+        self.order.insert(bisect.bisect_left(self.order, entry), entry)
+        self.positions[team] = len(self.order)
+        self.base_positions[team] = len(self.order)
+
+    # A team's game week: the latest week of the matches counted for it
+    def _week(self, team):
+        return max((week for match_id, result in self.matches.items()
+                    for side, week in zip(result[:2], self.match_weeks[match_id]) if side == team), default=0)
+
+    # Add (sign 1) or remove (sign -1) one match result from both teams' tallies
+    def _tally(self, result, sign):
+        home, away, home_score, away_score = result
+        for team, goals_for, goals_against in ((home, home_score, away_score), (away, away_score, home_score)):
+            tally = self.tallies[team]
+            tally['Goals_For'] += sign * goals_for
+            tally['Goals_Against'] += sign * goals_against
+            tally['Wins'] += sign * (goals_for > goals_against)
+            tally['Draws'] += sign * (goals_for == goals_against)
+            tally['Losses'] += sign * (goals_for < goals_against)
+            tally['Points'] += sign * (3 * (goals_for > goals_against) + (goals_for == goals_against))
+
+    # Move a team from its place under `old_key` to its place under its current key and
+    # renumber the teams in between; returns the teams whose position changed
+    def _reposition(self, team, old_key):
+        old_index = bisect.bisect_left(self.order, (old_key, team))
+        del self.order[old_index]
+        entry = (self._key(team), team)
+        new_index = bisect.bisect_left(self.order, entry)
+        self.order.insert(new_index, entry)
+        moved = set()
+        for index in range(min(old_index, new_index), max(old_index, new_index) + 1):
+            other = self.order[index][1]
+            if self.positions[other] != index + 1:
+                self.positions[other] = index + 1
+                moved.add(other)
+        return moved
+
+    # Apply one match state (a match-table row: Match_ID, Home_Team, Away_Team,
+    # Home_Score, Away_Score, Status). A match counts with its current score while it
+    # is in play or finished; any earlier state of the same match is replaced. A match
+    # advances its teams' game week when it first counts (to its fixture week, or the
+    # next week for a match missing from the fixture list) and gives it back if it
+    # stops counting. Returns the teams whose row changed.
+    def apply(self, match):
+        match_id = int(match['Match_ID'])
+        home, away = str(match['Home_Team']), str(match['Away_Team'])
+        counted = match['Status'] in LIVE_STATUSES and has_score(match['Home_Score']) and has_score(match['Away_Score'])
+        result = (home, away, int(match['Home_Score']), int(match['Away_Score'])) if counted else None
+        previous = self.matches.get(match_id)
+        if result == previous:
+            return set()
+
+        for team in (home, away):
+            if team not in self.tallies:
+                self._add_team(team)
+        teams = {home, away} | (set(previous[:2]) if previous else set())
+        old_keys = {team: self._key(team) for team in teams}
+        if previous:
+            self._tally(previous, -1)
+        if result:
+            self._tally(result, 1)
+            self.matches[match_id] = result
+            if previous is None:
+                home_week, away_week = self.fixture_weeks.get(match_id, (self.weeks[home] + 1, self.weeks[away] + 1))
+                self.match_weeks[match_id] = (home_week, away_week)
+                self.weeks[home] = max(self.weeks[home], home_week)
+                self.weeks[away] = max(self.weeks[away], away_week)
+        else:
+            self.matches.pop(match_id, None)
+            self.match_weeks.pop(match_id, None)
+            for team in previous[:2]:
+                self.weeks[team] = self._week(team)
+
+        changed = set(teams)
+        for team in teams:
+            changed |= self._reposition(team, old_keys[team])
+        self.version += 1
+        return changed
+
+    # Provisional table in table order, with each team's change of position since the start
+    def rows(self):
+        rows = []
+        for _, team in self.order:
+            tally = self.tallies[team]
+            rows.append({'Team': team, 'Game_Week': self.weeks[team], 'Position': self.positions[team], **tally,
+                         'Goal_Diff': tally['Goals_For'] - tally['Goals_Against'],
+                         'Change': self.base_positions[team] - self.positions[team]})
+        return rows
+
+# The provisional table and the matches it counts, written atomically
+def write_live_table(standings, live_matches, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': standings.version, 'updated': time.time(), 'rows': standings.rows(),
+                   'matches': list(live_matches.values())}, f)
+    os.replace(tmp_path, path)
+    return path
+
+# Polls the API for today's matches (or those between date_from and date_to) and
+# yields the ones whose state changed since the last poll. The client's ETag cache
+# makes an unchanged poll a 304.
+class ApiPollingSource:
+    def __init__(self, competition_id, interval=POLL_INTERVAL, client=None, date_from=None, date_to=None):
+        self.competition_id = competition_id
+        self.interval = interval
+        self.client = client
+        self.date_from = date_from
+        self.date_to = date_to
+
+    async def events(self):
+        import fetch_data
+        client = self.client or fetch_data.client
+        seen = {}
+        while True:
+            today = datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+            try:
+                data = await asyncio.to_thread(fetch_data.fetch_matches, self.competition_id,
+                                               self.date_from or today, self.date_to or today, client)
+            except Exception:
+                logger.exception("Polling competition %s failed; retrying", self.competition_id)
+            else:
+                changed = []
+                for match in data['matches']:
+                    row = fetch_data.match_row(match)
+                    if seen.get(row['Match_ID']) != row:
+                        seen[row['Match_ID']] = row
+                        changed.append(row)
+                if changed:
+                    yield changed
+            await asyncio.sleep(self.interval)
+
+# Replays match states from a JSON-lines file, one match-table row per line. A line's
+# optional "at" (seconds from the start) spaces the events out, `speed` times faster;
+# speed 0 replays without waiting.
+class ReplaySource:
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+
+    async def events(self):
+        start = time.monotonic()
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if self.speed and 'at' in event:
+                    await asyncio.sleep(max(0.0, start + event['at'] / self.speed - time.monotonic()))
+                yield [event]
+
+# Reads match states, one JSON row per line, from a TCP feed until it closes
+class SocketSource:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def events(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    yield [json.loads(line)]
+        finally:
+            writer.close()
+
+# Source from a --source argument: api, replay:PATH or socket:HOST:PORT
+def make_source(spec, competition_id=None, speed=1.0, interval=POLL_INTERVAL):
+    kind, _, argument = spec.partition(':')
+    if kind == 'api':
+        if competition_id is None:
+            raise ValueError('--competition-id is needed to poll the API')
+        return ApiPollingSource(competition_id, interval)
+    if kind == 'replay':
+        return ReplaySource(argument, speed)
+    if kind == 'socket':
+        host, _, port = argument.rpartition(':')
+        return SocketSource(host, int(port))
+    raise ValueError(f"unknown source {spec!r}")
+
+MATCH_FIELDS = ('Match_ID', 'Date', 'Home_Team', 'Away_Team', 'Home_Score', 'Away_Score', 'Status')
+
+# Consume a source, applying every change and publishing the table after each batch
+# that changed it or its list of matches. The list holds exactly the matches the
+# table counts, less those dated before the latest matchday seen (a long-running
+# API ingester moves on to the next day). Returns the standings when the source ends.
+async def ingest(source, standings, path):
+    live_matches = {}
+    latest_day = ''
+    async for batch in source.events():
+        changed = set()
+        published = list(live_matches.values())
+        for match in batch:
+            changed |= standings.apply(match)
+            match_id = int(match['Match_ID'])
+            if match_id in standings.matches:
+                live_matches[match_id] = {key: match.get(key) for key in MATCH_FIELDS}
+                latest_day = max(latest_day, str(match.get('Date') or '')[:10])
+            else:
+                live_matches.pop(match_id, None)
+        for match_id, match in list(live_matches.items()):
+            if match['Date'] and str(match['Date'])[:10] < latest_day:
+                del live_matches[match_id]
+        if changed or list(live_matches.values()) != published:
+            write_live_table(standings, live_matches, path)
+            logger.info("Live table version %d: %s", standings.version, ', '.join(sorted(changed)))
+    return standings
+
+# A published live table as the app sees it: rows by team and in table order, plus a
+# cache of whatever the app renders from it, so each (version, view) is built once
+# per process however many clients ask for it
+class LiveTable:
+    def __init__(self, state, version):
+        self.version = version
+        self.updated = state['updated']
+        self.rows = state['rows']
+        self.team_rows = {row['Team']: row for row in self.rows}
+        self.matches = state['matches']
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def view(self, key, build):
+        if key not in self._views:
+            with self._lock:
+                if key not in self._views:
+                    self._views[key] = build()
+        return self._views[key]
+
+# The app's view of every partition's live.json, checked for a new version at most
+# once per interval per partition. Only partitions in the store are tracked, so
+# requests for others cannot grow the table. A live table is ignored once the
+# partition's standings file is newer (process_data.py has stored the results it
+# was standing in for) or it is older than max_age.
+class LiveTables:
+    def __init__(self, store_dir=STORE_DIR, interval=CHECK_INTERVAL, max_age=MAX_AGE):
+        self.store_dir = store_dir
+        self.interval = interval
+        self.max_age = max_age
+        self._tables = {}
+
+    def get(self, competition, season):
+        key = (competition, season)
+        standings_path = partition_path(competition, season, 'standings', self.store_dir)
+        if key not in self._tables and not os.path.exists(standings_path):
+            return None
+        next_check, table = self._tables.get(key, (0.0, None))
+        now = time.monotonic()
+        if now < next_check:
+            return table
+        path = live_path(competition, season, self.store_dir)
+        try:
+            stat = os.stat(path)
+            version = (stat.st_mtime_ns, stat.st_size)
+            if stat.st_mtime_ns <= os.stat(standings_path).st_mtime_ns or time.time() - stat.st_mtime > self.max_age:
+                table = None
+            elif table is None or table.version != version:
+                with open(path) as f:
+                    table = LiveTable(json.load(f), version)
+        except (OSError, ValueError):
+            table = None
+        self._tables[key] = (now + self.interval, table)
+        return table
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stream live match states into a provisional table.')
+    parser.add_argument('--competition', default='PL')
+    parser.add_argument('--season', type=int, default=2023)
+    parser.add_argument('--source', default='api', help='api, replay:PATH or socket:HOST:PORT')
+    parser.add_argument('--competition-id', type=int, help='Football-Data.org competition id (api source)')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed-up; 0 replays without waiting')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='seconds between API polls')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    standings = LiveStandings.from_store(args.competition, args.season)
+    source = make_source(args.source, args.competition_id, args.speed, args.interval)
+    asyncio.run(ingest(source, standings, live_path(args.competition, args.season)))
@@ -0,0 +1,126 @@
+import numpy as np
+
+from storage import read_arrays, write_arrays
+
+# Per-venue result totals, from the row team's point of view
+RESULT_FIELDS = ['Wins', 'Draws', 'Losses', 'Goals_For', 'Goals_Against']
+HOME, AWAY = 0, 1
+
+# Team-pair index over the finished matches of a match table:
+#   teams           sorted team names; every array below uses their positions
+#   pair_results    (2, T, T, 5) int32: [venue, team, opponent] -> RESULT_FIELDS
+#   side_*          one entry per team per match, sorted by team then date
+#   team_offsets    (T + 1): team t's matches are side_*[team_offsets[t]:team_offsets[t + 1]]
+#   pair_order      side positions sorted by team, opponent, date
+#   pair_offsets    (T * T + 1): team t's matches against o are
+#                   pair_order[pair_offsets[t * T + o]:pair_offsets[t * T + o + 1]]
+# so a head-to-head record is one lookup and a last-N window is a slice.
+def build_pair_index(matches_df):
+    import pandas as pd
+    matches_df = matches_df[(matches_df['Status'] == 'FINISHED')
+                            & matches_df['Home_Score'].notna() & matches_df['Away_Score'].notna()]
+    teams = np.array(sorted(set(matches_df['Home_Team']) | set(matches_df['Away_Team'])), dtype=str)
+    n_teams = len(teams)
+    home = pd.Categorical(matches_df['Home_Team'], categories=teams).codes.astype(np.int64)
+    away = pd.Categorical(matches_df['Away_Team'], categories=teams).codes.astype(np.int64)
+    home_score = matches_df['Home_Score'].to_numpy(np.int64)
+    away_score = matches_df['Away_Score'].to_numpy(np.int64)
+    dates = pd.to_datetime(matches_df['Date'], utc=True).dt.tz_localize(None).to_numpy('datetime64[s]')
+    if 'Home_Game_Week' in matches_df:
+        weeks = np.concatenate([matches_df['Home_Game_Week'].to_numpy(np.int64), matches_df['Away_Game_Week'].to_numpy(np.int64)])
+    else:
+        weeks = np.tile(matches_df['Game_Week'].to_numpy(np.int64), 2)
+
+    # Both sides of every match: home sides first, then away sides
+    n_matches = len(matches_df)
+    team = np.concatenate([home, away])
+    opponent = np.concatenate([away, home])
+    venue = np.repeat([HOME, AWAY], n_matches)
+    goals_for = np.concatenate([home_score, away_score])
+    goals_against = np.concatenate([away_score, home_score])
+    date = np.tile(dates, 2)
+
+    order = np.lexsort((date, team))
+    team, opponent, venue, goals_for, goals_against, date, weeks = (
+        array[order] for array in (team, opponent, venue, goals_for, goals_against, date, weeks))
+    team_offsets = np.concatenate([[0], np.cumsum(np.bincount(team, minlength=n_teams))])
+
+    pair_key = team * n_teams + opponent
+    pair_order = np.lexsort((date, pair_key))
+    pair_offsets = np.concatenate([[0], np.cumsum(np.bincount(pair_key, minlength=n_teams * n_teams))])
+
+    # Dense results: one bincount per field over the flat (venue, team, opponent) key
+    flat_key = (venue * n_teams + team) * n_teams + opponent
+    fields = [goals_for > goals_against, goals_for == goals_against, goals_for < goals_against, goals_for, goals_against]
+    pair_results = np.stack([np.bincount(flat_key, weights=field, minlength=2 * n_teams * n_teams) for field in fields], axis=-1)
+
+    return {
+        'teams': teams,
+        'pair_results': pair_results.reshape(2, n_teams, n_teams, len(RESULT_FIELDS)).astype(np.int32),
+        'team_offsets': team_offsets.astype(np.int32),
+        'side_opponent': opponent.astype(np.int16),
+        'side_venue': venue.astype(np.int8),
+        'side_goals_for': goals_for.astype(np.int16),
+        'side_goals_against': goals_against.astype(np.int16),
+        'side_date': date,
+        'side_week': weeks.astype(np.int16),
+        'pair_order': pair_order.astype(np.int32),
+        'pair_offsets': pair_offsets.astype(np.int32),
+    }
+
+# Save the arrays as an uncompressed .npz, replaced atomically
+def write_pair_index(arrays, path):
+    return write_arrays(arrays, path)
+
+# Queries over a built index
+class PairIndex:
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.teams = [str(team) for team in arrays['teams']]
+        self.team_ids = {team: i for i, team in enumerate(self.teams)}
+        self.n_teams = len(self.teams)
+
+    @classmethod
+    def load(cls, path):
+        return cls(read_arrays(path))
+
+    # Result totals of `team` against `opponent`: venue 'home', 'away' or 'all'
+    def record(self, team, opponent, venue='all'):
+        results = self.arrays['pair_results'][:, self.team_ids[team], self.team_ids[opponent]]
+        totals = results.sum(axis=0) if venue == 'all' else results[HOME if venue == 'home' else AWAY]
+        return self._summary(totals)
+
+    # Home and away totals of `team` against the whole league
+    def splits(self, team):
+        results = self.arrays['pair_results'][:, self.team_ids[team]].sum(axis=1)
+        return {'home': self._summary(results[HOME]), 'away': self._summary(results[AWAY])}
+
+    # The team's last n matches, oldest first; against one opponent if given
+    def form(self, team, n=5, opponent=None):
+        if opponent is None:
+            start, end = self.arrays['team_offsets'][self.team_ids[team]:self.team_ids[team] + 2]
+            positions = np.arange(max(start, end - n), end)
+        else:
+            pair = self.team_ids[team] * self.n_teams + self.team_ids[opponent]
+            start, end = self.arrays['pair_offsets'][pair:pair + 2]
+            positions = self.arrays['pair_order'][max(start, end - n):end]
+        return [self._match(position) for position in positions]
+
+    def _summary(self, totals):
+        summary = dict(zip(RESULT_FIELDS, (int(value) for value in totals)))
+        summary['Played'] = summary['Wins'] + summary['Draws'] + summary['Losses']
+        summary['Points'] = 3 * summary['Wins'] + summary['Draws']
+        return summary
+
+    def _match(self, position):
+        arrays = self.arrays
+        goals_for, goals_against = int(arrays['side_goals_for'][position]), int(arrays['side_goals_against'][position])
+        return {
+            'Date': str(arrays['side_date'][position])[:10],
+            'Game_Week': int(arrays['side_week'][position]),
+            'Opponent': self.teams[arrays['side_opponent'][position]],
+            'Venue': 'H' if arrays['side_venue'][position] == HOME else 'A',
+            'Goals_For': goals_for,
+            'Goals_Against': goals_against,
+            'Result': 'W' if goals_for > goals_against else 'D' if goals_for == goals_against else 'L',
+        }
@@ -1,110 +1,401 @@
+import argparse
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
 
+import storage
+from aggregates import build_aggregates, file_hash, write_aggregates
+from pair_index import build_pair_index, write_pair_index
+
 # Load match data from CSV
 def load_data(file_path='data/football_matches.csv'):
     return pd.read_csv(file_path)
 
-# Assign game weeks to each match based on the team's match order
-def assign_game_weeks(matches_df):
-    matches_df['Game_Week'] = 0  # Initialize game week column
-    
-    # Process each team independently to ensure we assign game weeks correctly
-    teams = pd.concat([matches_df['Home_Team'], matches_df['Away_Team']]).unique()
-    
-    # For each team, assign game weeks based on the order of matches
-    for team in teams:
-        # Get the matches for the current team (both home and away), sorted by date
-        team_matches = matches_df[(matches_df['Home_Team'] == team) | (matches_df['Away_Team'] == team)].sort_values('Date')
-        
-        # Assign game weeks in sequential order for this team
-        team_matches['Game_Week'] = range(1, len(team_matches) + 1)
-        
-        # Merge the game weeks back into the main dataframe
-        matches_df.update(team_matches)
-    
+# Assign game weeks to each match based on each team's match order.
+# Home and away sides are stacked into one frame and every team's matches are
+# numbered by date with a single grouped cumcount, so each match gets both
+# Home_Game_Week and Away_Game_Week. Game_Week keeps the match-level week used
+# for the standings: the week of whichever side comes later in the order teams
+# first appear in Home_Team then Away_Team. Pass `by` (e.g. ['Competition',
+# 'Season']) to number several seasons independently in one call.
+def assign_game_weeks(matches_df, by=None):
+    by = list(by or [])
+    n_matches = len(matches_df)
+    teams = np.concatenate([matches_df['Home_Team'].to_numpy(), matches_df['Away_Team'].to_numpy()])
+
+    # One row per team per match: home sides first, then away sides
+    sides = pd.DataFrame({
+        'Team': teams,
+        'Date': np.tile(matches_df['Date'].to_numpy(), 2),
+        **{column: np.tile(matches_df[column].to_numpy(), 2) for column in by},
+    })
+    sides = sides.sort_values('Date', kind='stable')
+    side_weeks = np.empty(2 * n_matches, dtype=np.int64)
+    side_weeks[sides.index.to_numpy()] = sides.groupby(by + ['Team'], sort=False).cumcount().to_numpy() + 1
+
+    matches_df['Home_Game_Week'] = side_weeks[:n_matches]
+    matches_df['Away_Game_Week'] = side_weeks[n_matches:]
+    team_order, _ = pd.factorize(teams)
+    home_last = team_order[:n_matches] > team_order[n_matches:]
+    matches_df['Game_Week'] = np.where(home_last, side_weeks[:n_matches], side_weeks[n_matches:])
     return matches_df
 
-# Calculate standings by iterating through each game week
-def calculate_points_and_standings(matches_df):
-    standings = []  # Store standings per game week
-    teams_stats = {}  # To track points, wins, losses, draws, goals for/against, goal difference
-    
-    # Sort matches by game week
-    matches_df = matches_df.sort_values('Game_Week')
-    
-    # Process matches week by week
-    for game_week in sorted(matches_df['Game_Week'].unique()):
-        week_matches = matches_df[matches_df['Game_Week'] == game_week]
-        
-        # Update team stats based on match results for the current week
-        for idx, match in week_matches.iterrows():
-            home_team = match['Home_Team']
-            away_team = match['Away_Team']
-            home_score = match['Home_Score']
-            away_score = match['Away_Score']
-            
-            # Initialize team stats if not already present
-            if home_team not in teams_stats:
-                teams_stats[home_team] = {'points': 0, 'wins': 0, 'draws': 0, 'losses': 0,
-                                          'goals_for': 0, 'goals_against': 0, 'goal_diff': 0}
-            if away_team not in teams_stats:
-                teams_stats[away_team] = {'points': 0, 'wins': 0, 'draws': 0, 'losses': 0,
-                                          'goals_for': 0, 'goals_against': 0, 'goal_diff': 0}
-            
-            # Calculate the result for the home team
-            if home_score > away_score:
-                teams_stats[home_team]['points'] += 3
-                teams_stats[home_team]['wins'] += 1
-                teams_stats[away_team]['losses'] += 1
-            elif home_score < away_score:
-                teams_stats[away_team]['points'] += 3
-                teams_stats[away_team]['wins'] += 1
-                teams_stats[home_team]['losses'] += 1
-            else:
-                teams_stats[home_team]['points'] += 1
-                teams_stats[away_team]['points'] += 1
-                teams_stats[home_team]['draws'] += 1
-                teams_stats[away_team]['draws'] += 1
-            
-            # Update goals and goal difference
-            teams_stats[home_team]['goals_for'] += home_score
-            teams_stats[home_team]['goals_against'] += away_score
-            teams_stats[away_team]['goals_for'] += away_score
-            teams_stats[away_team]['goals_against'] += home_score
-            teams_stats[home_team]['goal_diff'] = teams_stats[home_team]['goals_for'] - teams_stats[home_team]['goals_against']
-            teams_stats[away_team]['goal_diff'] = teams_stats[away_team]['goals_for'] - teams_stats[away_team]['goals_against']
-        
-        # After updating team stats for this game week, sort teams by tie-breaking rules
-        sorted_teams = sorted(teams_stats.items(), key=lambda x: (x[1]['points'], x[1]['goal_diff'], x[1]['goals_for']), reverse=True)
-        
-        # Save the standings for this week
-        for position, (team, stats) in enumerate(sorted_teams, 1):
-            standings.append({
-                'Team': team,
-                'Game_Week': game_week,
-                'Position': position,
-                'Points': stats['points'],
-                'Wins': stats['wins'],
-                'Draws': stats['draws'],
-                'Losses': stats['losses'],
-                'Goals_For': stats['goals_for'],
-                'Goals_Against': stats['goals_against'],
-                'Goal_Diff': stats['goal_diff']
-            })
-    
-    standings_df = pd.DataFrame(standings)
+# Column order of the standings table written to standings_per_week.csv
+STANDINGS_COLUMNS = ['Team', 'Game_Week', 'Position', 'Points', 'Wins', 'Draws', 'Losses',
+                     'Goals_For', 'Goals_Against', 'Goal_Diff']
+
+# Calculate cumulative standings for every game week.
+# Matches are melted into one row per team per match, stats are summed per
+# (team, week) and accumulated with segmented cumulative sums, and positions come
+# from a single lexsort on (points, goal_diff, goals_for). Ties keep the order in
+# which teams first appear in the week-sorted match table. Pass `by` (e.g.
+# ['Competition', 'Season']) to build many independent tables in one call.
+def calculate_points_and_standings(matches_df, by=None):
+    by = list(by or [])
+
+    # Only matches with a full-time score count towards the table
+    matches_df = matches_df.dropna(subset=['Home_Score', 'Away_Score'])
+    if matches_df.empty:
+        # Typed columns, so a season before its first result stores and loads like any other
+        return pd.DataFrame({column: pd.Series(dtype=matches_df[column].dtype if column in by
+                                               else object if column == 'Team' else np.int64)
+                             for column in by + STANDINGS_COLUMNS})
+    matches_df = matches_df.sort_values('Game_Week', kind='stable')
+    n_matches = len(matches_df)
+
+    # Long form: home and away rows interleaved so first appearance follows match order
+    team_codes, team_names = pd.factorize(np.concatenate([matches_df['Home_Team'].to_numpy(), matches_df['Away_Team'].to_numpy()]))
+    team_codes = team_codes.reshape(2, n_matches).T.ravel()
+    home_score = matches_df['Home_Score'].to_numpy(dtype=np.int64)
+    away_score = matches_df['Away_Score'].to_numpy(dtype=np.int64)
+    goals_for = np.column_stack([home_score, away_score]).ravel()
+    goals_against = np.column_stack([away_score, home_score]).ravel()
+    week_codes, week_values = pd.factorize(np.repeat(matches_df['Game_Week'].to_numpy(), 2), sort=True)
+
+    # Independent tables, numbered in sorted key order
+    if by:
+        column_codes = [pd.factorize(matches_df[column], sort=True) for column in by]
+        group_ids = np.ravel_multi_index([codes for codes, _ in column_codes], [len(uniques) for _, uniques in column_codes])
+        _, group_first_match, group_codes = np.unique(group_ids, return_index=True, return_inverse=True)
+        group_keys = matches_df[by].iloc[group_first_match].reset_index(drop=True)
+        group_codes = np.repeat(group_codes, 2)
+    else:
+        group_codes = np.zeros(2 * n_matches, dtype=np.int64)
+    n_groups = int(group_codes.max()) + 1
+
+    # One entry per (group, team), numbered in order of first appearance
+    entry_codes, entry_keys = pd.factorize(group_codes * len(team_names) + team_codes)
+    entry_group = entry_keys // len(team_names)
+    entry_team = team_names[entry_keys % len(team_names)]
+
+    # One slot per (group, week), sorted so each group's weeks are contiguous
+    slot_keys, slot_codes = np.unique(group_codes * len(week_values) + week_codes, return_inverse=True)
+    slot_group = slot_keys // len(week_values)
+    slot_week = week_values[slot_keys % len(week_values)]
+    weeks_per_group = np.bincount(slot_group, minlength=n_groups)
+    group_first_slot = np.concatenate([[0], np.cumsum(weeks_per_group)[:-1]]).astype(np.int64)
+
+    # Dense grid: every entry gets a row for every week of its group
+    rows_per_entry = weeks_per_group[entry_group]
+    entry_start = np.concatenate([[0], np.cumsum(rows_per_entry)[:-1]]).astype(np.int64)
+    n_rows = int(rows_per_entry.sum())
+    grid_entry = np.repeat(np.arange(len(entry_keys)), rows_per_entry)
+    grid_slot = np.repeat(group_first_slot[entry_group], rows_per_entry) + np.arange(n_rows) - np.repeat(entry_start, rows_per_entry)
+
+    # Scatter per-match results into the grid and accumulate within each entry
+    cell = entry_start[entry_codes] + slot_codes - group_first_slot[group_codes]
+    wins = goals_for > goals_against
+    draws = goals_for == goals_against
+    per_match = {
+        'Points': 3 * wins + draws,
+        'Wins': wins,
+        'Draws': draws,
+        'Losses': goals_for < goals_against,
+        'Goals_For': goals_for,
+        'Goals_Against': goals_against,
+        'Played': np.ones(2 * n_matches, dtype=np.int64),
+    }
+    cumulative = {}
+    for column, values in per_match.items():
+        totals = np.bincount(cell, weights=values, minlength=n_rows).astype(np.int64).cumsum()
+        offsets = np.concatenate([[0], totals[entry_start[1:] - 1]])
+        cumulative[column] = totals - np.repeat(offsets, rows_per_entry)
+
+    # Teams only enter the table from the week of their first match
+    keep = cumulative.pop('Played') > 0
+    grid_entry, grid_slot = grid_entry[keep], grid_slot[keep]
+    stats = {column: values[keep] for column, values in cumulative.items()}
+    stats['Goal_Diff'] = stats['Goals_For'] - stats['Goals_Against']
+
+    # Rank every (group, week) table at once
+    order = np.lexsort((grid_entry, -stats['Goals_For'], -stats['Goal_Diff'], -stats['Points'], grid_slot))
+    sorted_slot = grid_slot[order]
+    slot_start = np.flatnonzero(np.r_[True, sorted_slot[1:] != sorted_slot[:-1]])
+    slot_sizes = np.diff(np.r_[slot_start, len(order)])
+    position = np.arange(len(order)) - np.repeat(slot_start, slot_sizes) + 1
+
+    standings_df = pd.DataFrame({
+        'Team': entry_team[grid_entry[order]],
+        'Game_Week': slot_week[grid_slot[order]],
+        'Position': position,
+        **{column: stats[column][order] for column in STANDINGS_COLUMNS[3:]},
+    }, columns=STANDINGS_COLUMNS)
+    if by:
+        group_frame = group_keys.take(slot_group[sorted_slot]).reset_index(drop=True)
+        standings_df = pd.concat([group_frame, standings_df], axis=1)
     return standings_df
 
+# Running per-team state for incremental updates, kept next to the standings file
+STATE_FILE = 'data/standings_state.json'
+TALLY_COLUMNS = ['Points', 'Wins', 'Draws', 'Losses', 'Goals_For', 'Goals_Against']
+
+# Matches that count towards the table
+def finished_matches(matches_df):
+    return matches_df[matches_df['Status'] == 'FINISHED']
+
+# Order in which teams first appear in the week-sorted match table (the tie-break order)
+def team_order(matches_df):
+    matches_df = matches_df.sort_values('Game_Week', kind='stable')
+    return pd.unique(np.column_stack([matches_df['Home_Team'].to_numpy(), matches_df['Away_Team'].to_numpy()]).ravel())
+
+# Write the standings CSV atomically and return the byte offset where each week's rows start
+def write_standings(standings_df, standings_file):
+    week_offsets = {}
+    tmp_file = standings_file + '.tmp'
+    with open(tmp_file, 'w', newline='') as f:
+        standings_df.head(0).to_csv(f, index=False)
+        for game_week, week_df in standings_df.groupby('Game_Week', sort=True):
+            week_offsets[str(game_week)] = f.tell()
+            week_df.to_csv(f, index=False, header=False)
+    os.replace(tmp_file, standings_file)
+    return week_offsets
+
+# Cumulative totals per team from one week's rows of the standings file
+def read_week_totals(standings_file, week_offsets, game_week):
+    weeks = sorted(int(week) for week in week_offsets)
+    start = week_offsets[str(game_week)]
+    later = [week_offsets[str(week)] for week in weeks if week > game_week]
+    with open(standings_file, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(later[0] - start) if later else f.read()
+    week_df = pd.read_csv(io.BytesIO(chunk), names=STANDINGS_COLUMNS)
+    return {row['Team']: {column: int(row[column]) for column in TALLY_COLUMNS} for _, row in week_df.iterrows()}
+
+def save_state(state, state_file):
+    tmp_file = state_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_file, state_file)
+
+# Identity of the standings file a saved state describes: its size and a digest of its
+# contents, so a different file of the same size (a checkout, copy or restore) is caught
+def standings_stamp(standings_file):
+    return [os.path.getsize(standings_file), file_hash(standings_file)]
+
+# Saved state, or None when it is missing or no longer matches the standings file
+def load_state(state_file, standings_file):
+    if not (os.path.exists(state_file) and os.path.exists(standings_file)):
+        return None
+    with open(state_file) as f:
+        state = json.load(f)
+    if state.get('standings_stamp') != standings_stamp(standings_file):
+        return None
+    return state
+
+# Recompute the whole season from the finished matches and reset the saved state
+def rebuild_standings(matches_df, standings_file='data/standings_per_week.csv', state_file=STATE_FILE):
+    finished = finished_matches(matches_df)
+    standings_df = calculate_points_and_standings(finished)
+    week_offsets = write_standings(standings_df, standings_file)
+
+    last_week = int(standings_df['Game_Week'].max()) if len(standings_df) else 0
+    totals = standings_df[standings_df['Game_Week'] == last_week].set_index('Team')
+    save_state({
+        'match_weeks': dict(zip(finished['Match_ID'].astype(str), finished['Game_Week'].astype(int))),
+        'teams': [[team, {column: int(totals.at[team, column]) for column in TALLY_COLUMNS}]
+                  for team in team_order(finished)],
+        'last_week': last_week,
+        'week_offsets': week_offsets,
+        'standings_stamp': standings_stamp(standings_file),
+    }, state_file)
+    return standings_df
+
+# Apply only matches that finished since the last run. Matches are replayed from
+# the earliest game week they touch, on top of the totals stored in the standings
+# file for the week before, and only the rows from that week on are rewritten at
+# the end of the file. On a matchday that is the latest week or two, so the cost
+# follows the new results rather than the season length. A missing or stale state
+# file, or fixtures whose game week changed, fall back to a full rebuild.
+# Returns the number of newly applied matches.
+def update_standings(matches_file='data/football_matches.csv', standings_file='data/standings_per_week.csv',
+                     state_file=STATE_FILE):
+    matches_df = assign_game_weeks(load_data(matches_file))
+    finished = finished_matches(matches_df)
+    state = load_state(state_file, standings_file)
+    if state is None:
+        rebuild_standings(matches_df, standings_file, state_file)
+        return len(finished)
+
+    # Matches already in the table must keep the game week they were counted in
+    match_ids = finished['Match_ID'].astype(str)
+    processed = match_ids.isin(state['match_weeks'])
+    known_weeks = match_ids[processed].map(state['match_weeks'])
+    new_matches = finished[~processed]
+    if processed.sum() != len(state['match_weeks']) or (known_weeks != finished.loc[processed, 'Game_Week']).any():
+        rebuild_standings(matches_df, standings_file, state_file)
+        return len(new_matches)
+    if new_matches.empty:
+        return 0
+
+    # Starting totals: the latest table when only new weeks are added, otherwise
+    # the table of the last week before the earliest affected one
+    first_week = int(new_matches['Game_Week'].min())
+    week_offsets = state['week_offsets']
+    rewrite_from = None
+    if first_week > state['last_week']:
+        teams = dict(state['teams'])
+    else:
+        earlier_weeks = [int(week) for week in week_offsets if int(week) < first_week]
+        base = read_week_totals(standings_file, week_offsets, max(earlier_weeks)) if earlier_weeks else {}
+        teams = {team: base[team] for team, _ in state['teams'] if team in base}
+        rewrite_from = week_offsets[str(min(int(week) for week in week_offsets if int(week) >= first_week))]
+
+    # Replay the affected weeks and re-rank each (at most 20-team) table
+    weekly_rows = []
+    for game_week, week_matches in finished[finished['Game_Week'] >= first_week].groupby('Game_Week', sort=True):
+        for match in week_matches.itertuples(index=False):
+            home_score, away_score = int(match.Home_Score), int(match.Away_Score)
+            for team, goals_for, goals_against in ((match.Home_Team, home_score, away_score),
+                                                   (match.Away_Team, away_score, home_score)):
+                tally = teams.setdefault(team, dict.fromkeys(TALLY_COLUMNS, 0))
+                tally['Points'] += 3 if goals_for > goals_against else int(goals_for == goals_against)
+                tally['Wins'] += int(goals_for > goals_against)
+                tally['Draws'] += int(goals_for == goals_against)
+                tally['Losses'] += int(goals_for < goals_against)
+                tally['Goals_For'] += goals_for
+                tally['Goals_Against'] += goals_against
+
+        ranked = sorted(teams.items(), key=lambda x: (x[1]['Points'], x[1]['Goals_For'] - x[1]['Goals_Against'], x[1]['Goals_For']),
+                        reverse=True)
+        weekly_rows.append((int(game_week), pd.DataFrame([
+            {'Team': team, 'Game_Week': int(game_week), 'Position': position, **tally,
+             'Goal_Diff': tally['Goals_For'] - tally['Goals_Against']}
+            for position, (team, tally) in enumerate(ranked, 1)
+        ], columns=STANDINGS_COLUMNS)))
+
+    # Rewrite the rows from the earliest affected week, or append the new weeks
+    with open(standings_file, 'r+', newline='') as f:
+        if rewrite_from is None:
+            f.seek(0, os.SEEK_END)
+        else:
+            f.seek(rewrite_from)
+        f.truncate()
+        for game_week, week_df in weekly_rows:
+            week_offsets[str(game_week)] = f.tell()
+            week_df.to_csv(f, index=False, header=False)
+
+    state['match_weeks'].update(zip(new_matches['Match_ID'].astype(str), new_matches['Game_Week'].astype(int)))
+    state['teams'] = [[team, tally] for team, tally in teams.items()]
+    state['last_week'] = max(state['last_week'], weekly_rows[-1][0])
+    state['standings_stamp'] = standings_stamp(standings_file)
+    save_state(state, state_file)
+    return len(new_matches)
+
+# Publish a season's matches, team-pair index, standings and the startup snapshot of
+# the standings aggregates to the columnar store. The app reloads a partition when
+# any of its files changes, and ignores a startup snapshot built from other standings,
+# so a reload between the last two writes reads the standings themselves. The
+# aggregates come from the stored table, with the dtypes the app reads back.
+def write_to_store(matches_df, standings_df, competition, season, store_dir=storage.STORE_DIR):
+    storage.write_partition(matches_df, competition, season, 'matches', store_dir)
+    write_pair_index(build_pair_index(matches_df),
+                     storage.partition_path(competition, season, 'pairs', store_dir, extension='npz'))
+    standings_path = storage.write_partition(standings_df, competition, season, 'standings', store_dir)
+    write_aggregates(build_aggregates(storage.read_table(standings_path)),
+                     storage.partition_path(competition, season, 'aggregates', store_dir, extension='npz'), standings_path)
+
+# One batch job, run in a worker process: load a season's matches from `matches_file`
+# (CSV or a store partition), rebuild game weeks and standings, and write the
+# partition. As in rebuild_standings, only finished matches count towards the
+# standings. Only paths cross the process boundary, never DataFrames.
+def process_partition(competition, season, matches_file, store_dir=storage.STORE_DIR):
+    start = time.perf_counter()
+    matches_df = assign_game_weeks(storage.read_data_file(matches_file))
+    standings_df = calculate_points_and_standings(finished_matches(matches_df))
+    write_to_store(matches_df, standings_df, competition, season, store_dir)
+    return len(matches_df), len(standings_df), time.perf_counter() - start
+
+# Reprocess many (competition, season, matches_file) jobs across a process pool,
+# printing one line per job as it finishes. Returns the failed jobs with their tracebacks.
+def process_batch(jobs, workers=None, store_dir=storage.STORE_DIR):
+    failures = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_partition, competition, season, matches_file, store_dir): (competition, season)
+                   for competition, season, matches_file in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            competition, season = futures[future]
+            try:
+                n_matches, n_rows, seconds = future.result()
+                print(f"[{done}/{len(jobs)}] {competition} {season}: {n_matches} matches, {n_rows} standings rows in {seconds:.2f}s")
+            except Exception:
+                failures.append((competition, season, traceback.format_exc()))
+                print(f"[{done}/{len(jobs)}] {competition} {season}: FAILED\n{failures[-1][2]}")
+    print(f"Processed {len(jobs) - len(failures)}/{len(jobs)} partitions in {time.perf_counter() - start:.1f}s")
+    return failures
+
+# Batch jobs from --partition COMPETITION:SEASON[:MATCHES_FILE] arguments; without a file, or
+# without any arguments at all, the matches already in the store are reprocessed
+def batch_jobs(partitions, store_dir=storage.STORE_DIR):
+    if not partitions:
+        return [(competition, season, storage.partition_path(competition, season, 'matches', store_dir))
+                for competition, season in storage.list_partitions('matches', store_dir)]
+    jobs = []
+    for partition in partitions:
+        competition, season, *matches_file = partition.split(':', 2)
+        matches_file = matches_file[0] if matches_file else storage.partition_path(competition, int(season), 'matches', store_dir)
+        jobs.append((competition, int(season), matches_file))
+    return jobs
+
 # Main process
 if __name__ == '__main__':
-    # Load the match data
-    matches_df = load_data('data/football_matches.csv')
+    parser = argparse.ArgumentParser(description='Build data/standings_per_week.csv from data/football_matches.csv.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='apply only newly finished matches using the saved state in ' + STATE_FILE)
+    parser.add_argument('--competition', default='PL', help='competition code of the store partition to write')
+    parser.add_argument('--season', type=int, default=2023, help='starting year of the season')
+    parser.add_argument('--batch', action='store_true',
+                        help='reprocess store partitions in parallel instead of the CSV')
+    parser.add_argument('--partition', action='append', default=[], metavar='COMPETITION:SEASON[:MATCHES_FILE]',
+                        help='partition for --batch (repeatable; default: every partition in the store)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes for --batch (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.batch:
+        failures = process_batch(batch_jobs(args.partition), args.workers)
+        raise SystemExit(1 if failures else 0)
+
+    if args.incremental:
+        applied = update_standings()
+        print(f"Applied {applied} newly finished matches")
+        matches_df = assign_game_weeks(load_data('data/football_matches.csv'))
+        standings_df = pd.read_csv('data/standings_per_week.csv',
+                                   dtype={column: np.int64 for column in STANDINGS_COLUMNS[1:]})
+    else:
+        # Load the match data
+        matches_df = load_data('data/football_matches.csv')
 
-    # Assign game weeks based on team match order
-    matches_df = assign_game_weeks(matches_df)
+        # Assign game weeks based on team match order
+        matches_df = assign_game_weeks(matches_df)
 
-    # Calculate standings per week
-    standings_df = calculate_points_and_standings(matches_df)
+        # Calculate standings per week and save them to a CSV file
+        standings_df = rebuild_standings(matches_df)
 
-    # Save standings to a CSV file
-    standings_df.to_csv('data/standings_per_week.csv', index=False)
+    # Save both tables to the season's partition of the columnar store
+    write_to_store(matches_df, standings_df, args.competition, args.season)
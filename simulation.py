@@ -0,0 +1,162 @@
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import storage
+from process_data import team_order
+
+# Finishing places reported: title and top four (positions up to the value) and relegation (the last three)
+TOP_PLACES = {'Title': 1, 'Top_4': 4}
+RELEGATION_PLACES = 3
+PROBABILITY_COLUMNS = ['Title', 'Top_4', 'Relegation', 'Expected_Points']
+
+# Simulations per game week, and how many are sampled at once (bounds memory to
+# BATCH_SIZE x remaining fixtures scorelines)
+N_SIMULATIONS = 10_000
+BATCH_SIZE = 5_000
+
+# Pseudo-matches of league-average scoring each team's rates are shrunk towards,
+# so a team's first few results do not dominate its strength
+PRIOR_MATCHES = 5
+
+# Bumped whenever the model changes, to invalidate cached weeks
+MODEL_VERSION = 1
+
+# Poisson scoring rates for a list of fixtures from each team's goals for and against
+# per match so far: expected home goals = league home average x home attack x away defence
+def fit_rates(played, goals_for, goals_against, home_goals, away_goals, home, away):
+    total_played = played.sum()
+    average = goals_for.sum() / total_played if total_played else 1.0
+    attack = (goals_for + PRIOR_MATCHES * average) / (played + PRIOR_MATCHES) / average
+    defence = (goals_against + PRIOR_MATCHES * average) / (played + PRIOR_MATCHES) / average
+    home_average = home_goals.mean() if len(home_goals) else average
+    away_average = away_goals.mean() if len(away_goals) else average
+    return home_average * attack[home] * defence[away], away_average * attack[away] * defence[home]
+
+# Finishing positions for every simulation at once: points, then goal difference, then
+# goals for, then the table's first-appearance order, packed into one integer sort key
+def rank(points, goal_diff, goals_for, tie_order):
+    n_teams = points.shape[1]
+    gd_offset = int(np.abs(goal_diff).max()) + 1
+    gf_span = int(goals_for.max()) + 1
+    key = ((points * (2 * gd_offset + 1) + goal_diff + gd_offset) * gf_span + goals_for) * n_teams + (n_teams - 1 - tie_order)
+    order = np.argsort(-key, axis=1, kind='stable')
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(1, n_teams + 1)[None, :], axis=1)
+    return positions
+
+# Simulate the rest of the season from one game week's table. `base` holds each team's
+# Points, Goal_Diff, Goals_For so far; every remaining fixture is sampled in all
+# simulations of a batch at once and scattered onto teams with one matrix product.
+def simulate_week(base, tie_order, home, away, home_rate, away_rate, n_simulations, rng):
+    n_teams = len(tie_order)
+    home_onehot = np.zeros((len(home), n_teams), dtype=np.float32)
+    home_onehot[np.arange(len(home)), home] = 1
+    away_onehot = np.zeros((len(away), n_teams), dtype=np.float32)
+    away_onehot[np.arange(len(away)), away] = 1
+
+    counts = {outcome: np.zeros(n_teams) for outcome in PROBABILITY_COLUMNS}
+    for start in range(0, n_simulations, BATCH_SIZE):
+        size = min(BATCH_SIZE, n_simulations - start)
+        home_goals = rng.poisson(home_rate, size=(size, len(home))).astype(np.float32)
+        away_goals = rng.poisson(away_rate, size=(size, len(away))).astype(np.float32)
+        draws = home_goals == away_goals
+        home_points = (3 * (home_goals > away_goals) + draws).astype(np.float32)
+        away_points = (3 * (away_goals > home_goals) + draws).astype(np.float32)
+
+        points = base['Points'] + (home_points @ home_onehot + away_points @ away_onehot).astype(np.int64)
+        goals_for = base['Goals_For'] + (home_goals @ home_onehot + away_goals @ away_onehot).astype(np.int64)
+        goals_against = (away_goals @ home_onehot + home_goals @ away_onehot).astype(np.int64)
+        goal_diff = base['Goal_Diff'] + (goals_for - base['Goals_For']) - goals_against
+        positions = rank(points, goal_diff, goals_for, tie_order)
+
+        for outcome, places in TOP_PLACES.items():
+            counts[outcome] += (positions <= places).sum(axis=0)
+        counts['Relegation'] += (positions > n_teams - RELEGATION_PLACES).sum(axis=0)
+        counts['Expected_Points'] += points.sum(axis=0)
+    return {outcome: total / n_simulations for outcome, total in counts.items()}
+
+# Cache key of one game week: the fixture list, the results up to that week and the settings
+def week_fingerprint(fixtures, played_mask, n_simulations, seed):
+    digest = hashlib.sha1(f'{MODEL_VERSION}:{n_simulations}:{seed}'.encode())
+    for column in ('Home_Team', 'Away_Team', 'Game_Week'):
+        # UTF-8, so any team name hashes; padded to the text width, so ASCII values give
+        # the same bytes (and fingerprints) as before
+        values = fixtures[column].to_numpy().astype(str)
+        encoded = np.char.encode(values, 'utf-8')
+        digest.update(encoded.astype(f'S{max(encoded.itemsize, values.itemsize // 4)}').tobytes())
+    digest.update(played_mask.tobytes())
+    digest.update(fixtures[['Home_Score', 'Away_Score']].to_numpy(float)[played_mask].tobytes())
+    return digest.hexdigest()
+
+# Title, top-four and relegation probabilities (and expected final points) for every team
+# as of every game week of the standings. As of week w the matches finished by week w
+# are fixed and every other fixture is simulated. Weeks whose fingerprint matches a
+# row in `cached` are reused rather than simulated again.
+def simulate_season(matches_df, standings_df, n_simulations=N_SIMULATIONS, seed=0, cached=None):
+    fixtures = matches_df.sort_values('Game_Week', kind='stable').reset_index(drop=True)
+    finished = (fixtures['Status'] == 'FINISHED').to_numpy() & fixtures['Home_Score'].notna().to_numpy() \
+        & fixtures['Away_Score'].notna().to_numpy()
+    teams = team_order(fixtures)
+    team_ids = {team: i for i, team in enumerate(teams)}
+    tie_order = np.arange(len(teams))
+    home = fixtures['Home_Team'].map(team_ids).to_numpy(np.int64)
+    away = fixtures['Away_Team'].map(team_ids).to_numpy(np.int64)
+    weeks = fixtures['Game_Week'].to_numpy()
+    home_score = fixtures['Home_Score'].to_numpy(float)
+    away_score = fixtures['Away_Score'].to_numpy(float)
+
+    cached_weeks = {}
+    if cached is not None:
+        for week, week_df in cached.groupby('Game_Week', observed=True):
+            cached_weeks[week_df['Fingerprint'].iloc[0]] = week_df
+
+    frames = []
+    for week, week_standings in standings_df.groupby('Game_Week', sort=True):
+        played = finished & (weeks <= week)
+        fingerprint = week_fingerprint(fixtures, played, n_simulations, seed)
+        if fingerprint in cached_weeks:
+            frames.append(cached_weeks[fingerprint].assign(Game_Week=week))
+            continue
+
+        table = week_standings.set_index('Team').reindex(teams).fillna(0)
+        base = {column: table[column].to_numpy(np.int64) for column in ('Points', 'Goal_Diff', 'Goals_For')}
+        remaining = ~played
+        home_rate, away_rate = fit_rates(
+            (table['Wins'] + table['Draws'] + table['Losses']).to_numpy(float), table['Goals_For'].to_numpy(float),
+            table['Goals_Against'].to_numpy(float), home_score[played], away_score[played], home[remaining], away[remaining])
+
+        rng = np.random.default_rng([seed, int(week)])
+        probabilities = simulate_week(base, tie_order, home[remaining], away[remaining], home_rate, away_rate,
+                                      n_simulations, rng)
+        frames.append(pd.DataFrame({'Team': teams, 'Game_Week': week, **probabilities, 'Fingerprint': fingerprint}))
+
+    return pd.concat(frames, ignore_index=True)[['Team', 'Game_Week'] + PROBABILITY_COLUMNS + ['Fingerprint']]
+
+# Simulate a store partition and save the result next to its standings, reusing unchanged weeks
+def simulate_partition(competition, season, n_simulations=N_SIMULATIONS, seed=0, force=False, store_dir=storage.STORE_DIR):
+    matches_df = storage.read_partition(competition, season, 'matches', store_dir)
+    standings_df = storage.read_partition(competition, season, 'standings', store_dir)
+    cache_path = storage.partition_path(competition, season, 'probabilities', store_dir)
+    cached = storage.read_table(cache_path) if os.path.exists(cache_path) and not force else None
+    probabilities_df = simulate_season(matches_df, standings_df, n_simulations, seed, cached)
+    storage.write_partition(probabilities_df, competition, season, 'probabilities', store_dir)
+    return probabilities_df
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Monte Carlo title, top-four and relegation probabilities per game week.')
+    parser.add_argument('--competition', default='PL')
+    parser.add_argument('--season', type=int, default=2023)
+    parser.add_argument('--simulations', type=int, default=N_SIMULATIONS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--force', action='store_true', help='ignore cached weeks and simulate every week again')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    probabilities_df = simulate_partition(args.competition, args.season, args.simulations, args.seed, args.force)
+    print(f"Simulated {probabilities_df['Game_Week'].nunique()} game weeks x {args.simulations} simulations "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+
+# pandas and pyarrow are imported by the functions that use them: the app starts from
+# list_partitions and the startup snapshots alone, and pays for them on first use
+
+# Root of the columnar store: one Arrow IPC file per table, partitioned by
+# competition and season (data/store/competition=PL/season=2023/standings.arrow)
+STORE_DIR = os.environ.get('DATA_STORE_DIR', 'data/store')
+
+# Text columns stored as dictionaries (pandas categoricals)
+CATEGORICAL_COLUMNS = ['Team', 'Home_Team', 'Away_Team', 'Status', 'Fingerprint']
+
+def partition_path(competition, season, table='standings', store_dir=STORE_DIR, extension='arrow'):
+    return os.path.join(store_dir, f'competition={competition}', f'season={season}', f'{table}.{extension}')
+
+# (competition, season) pairs present in the store, sorted with the latest season first
+def list_partitions(table='standings', store_dir=STORE_DIR):
+    partitions = []
+    if not os.path.isdir(store_dir):
+        return partitions
+    for competition_dir in os.listdir(store_dir):
+        if not competition_dir.startswith('competition='):
+            continue
+        for season_dir in os.listdir(os.path.join(store_dir, competition_dir)):
+            if season_dir.startswith('season=') and os.path.exists(os.path.join(store_dir, competition_dir, season_dir, f'{table}.arrow')):
+                partitions.append((competition_dir.split('=', 1)[1], int(season_dir.split('=', 1)[1])))
+    return sorted(partitions, key=lambda partition: (partition[0], -partition[1]))
+
+# Shrink a frame for storage: categorical team names and the smallest integer types
+def compact_dtypes(df):
+    import pandas as pd
+    df = df.copy()
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS:
+            # Typed categories even when there are none (a season before its first
+            # result), so Arrow writes a string dictionary rather than a null one
+            categories = pd.Index(sorted(df[column].dropna().unique()), dtype=object if len(df) else 'string')
+            df[column] = pd.Categorical(df[column], categories=categories)
+        elif pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+# Write one table of one partition as an uncompressed Arrow IPC file, replaced atomically
+def write_partition(df, competition, season, table='standings', store_dir=STORE_DIR):
+    import pyarrow as pa
+    path = partition_path(competition, season, table, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    arrow_table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    os.replace(tmp_path, path)
+    return path
+
+# Read an Arrow IPC file through a memory map. Numeric columns are zero-copy views
+# of the mapped file, so every process reading the same partition shares the page
+# cache instead of holding its own parsed copy; dictionary columns become categoricals
+# (converted chunk by chunk, which also copes with an empty file's null dictionaries).
+def read_table(path):
+    import pandas as pd
+    import pyarrow as pa
+    with pa.memory_map(path, 'r') as source:
+        arrow_table = pa.ipc.open_file(source).read_all()
+    columns = {}
+    for name, column in zip(arrow_table.column_names, arrow_table.columns):
+        if pa.types.is_dictionary(column.type) or column.null_count or not pa.types.is_integer(column.type):
+            columns[name] = column.to_pandas()
+        else:
+            columns[name] = column.combine_chunks().to_numpy(zero_copy_only=True)
+    return pd.DataFrame(columns, copy=False)
+
+def read_partition(competition, season, table='standings', store_dir=STORE_DIR):
+    return read_table(partition_path(competition, season, table, store_dir))
+
+# Load a standings or matches file from the store (.arrow) or a CSV
+def read_data_file(path):
+    if path.endswith('.arrow'):
+        return read_table(path)
+    import pandas as pd
+    return pd.read_csv(path)
+
+# Save named numpy arrays as an uncompressed .npz, replaced atomically
+def write_arrays(arrays, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+def read_arrays(path):
+    with np.load(path, allow_pickle=False) as npz:
+        return {name: npz[name] for name in npz.files}